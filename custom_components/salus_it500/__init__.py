@@ -1,15 +1,24 @@
 """The Salus iT500 component."""
+import asyncio
 import time
 import logging
 import re
-import threading
-import requests
-import json
+import dataclasses
+import hashlib
+import os
+import random
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from http.cookies import SimpleCookie
+import aiohttp
 import voluptuous as vol
+from yarl import URL
 
-from homeassistant.components.climate import DOMAIN as CLIMATE_DOMAIN
-from homeassistant.components.water_heater import DOMAIN as WATER_HEATER_DOMAIN
+from homeassistant.core import SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import discovery
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.storage import STORAGE_DIR, Store
 import homeassistant.helpers.config_validation as cv
 from homeassistant.const import (
     CONF_PASSWORD,
@@ -17,100 +26,777 @@ from homeassistant.const import (
     CONF_ID,
 )
 
+from .const import (
+    DOMAIN,
+    PLATFORMS,
+    DEFAULT_PLATFORMS,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_DATA_TTL,
+    CONF_TOKEN_TTL,
+    CONF_HISTORY_FILE,
+    HISTORY_SIZE,
+    HISTORY_FLUSH_INTERVAL,
+    DEFAULT_HISTORY_HOURS,
+    DEFAULT_HISTORY_RESOLUTION,
+    MIN_TEMP,
+    MAX_TEMP,
+    DATA_TTL,
+    TOKEN_TTL,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+    STORAGE_SAVE_DELAY,
+    STORAGE_SNAPSHOT_KEY,
+    STORAGE_SNAPSHOT_SAVE_DELAY,
+    CONF_CONNECT_TIMEOUT,
+    CONF_READ_TIMEOUT,
+    CONF_DEADLINE,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_DEADLINE,
+    FETCH_CONCURRENCY,
+    STARTUP_STAGGER,
+)
+from .coordinator import SalusCoordinator
+from .history import History
+from .metrics import ClientMetrics
+from .scheduler import FetchScheduler
+from .schema import ACCOUNT_SCHEMA
+from .models import DeviceState, DeviceStateError, is_values_body
+
 _LOGGER = logging.getLogger(__name__)
 
 __version__ = "0.0.1"
 
-DOMAIN = "salus_it500"
-PLATFORMS = "platforms"
-DEFAULT_PLATFORMS = [CLIMATE_DOMAIN, WATER_HEATER_DOMAIN]
+# The control page carries the device token in a hidden input. Match the tag
+# whatever the attribute order, and never run past its closing ">".
+TOKEN_INPUT_RE = re.compile(rb"""<input\b[^>]*?\sid\s*=\s*(["'])token\1[^>]*>""", re.IGNORECASE)
+TOKEN_VALUE_RE = re.compile(rb"""\svalue\s*=\s*(["'])(.*?)\1""", re.IGNORECASE | re.DOTALL)
+TOKEN_CHUNK_SIZE = 4096
+# Longest partial tag carried over between chunks.
+TOKEN_MAX_TAG = 1024
+# Calls made after the session expired get the site's HTML login page.
+LOGIN_PAGE_RE = re.compile(rb"\s*<")
 
-# A single fetch of ajax_device_values.php carries both the thermostat (CH1*)
-# and water heater (HW*) data, so we cache it briefly and serve both entities
-# from one network call. Keep below the fastest poll interval (water_heater = 60s)
-# so each poll still gets reasonably fresh data.
-DATA_TTL = 115          # seconds
-# Refresh the session token proactively instead of only after a call fails.
-TOKEN_TTL = 30 * 60    # seconds
-
-CONFIG_SCHEMA = vol.Schema(
+SERVICE_GET_HISTORY = "get_history"
+GET_HISTORY_SCHEMA = vol.Schema(
     {
-        DOMAIN: vol.Schema(
-            {
-                vol.Required(CONF_USERNAME): cv.string,
-                vol.Required(CONF_PASSWORD): cv.string,
-                vol.Required(CONF_ID): cv.string,
-                vol.Optional(PLATFORMS, default=DEFAULT_PLATFORMS): vol.All(cv.ensure_list, [cv.string]),
-            }
-        )
-    },
-    extra=vol.ALLOW_EXTRA,
+        vol.Required(CONF_ID): cv.string,
+        vol.Optional("hours", default=DEFAULT_HISTORY_HOURS): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional("resolution", default=DEFAULT_HISTORY_RESOLUTION): vol.All(vol.Coerce(float), vol.Range(min=1)),
+    }
 )
 
+# One account, or a list of them (e.g. one per property).
+CONFIG_SCHEMA = vol.Schema({DOMAIN: vol.All(cv.ensure_list, [ACCOUNT_SCHEMA])}, extra=vol.ALLOW_EXTRA)
+
+# hass.data key of what all accounts share; hass.data[DOMAIN] maps device ids.
+SHARED_DATA = f"{DOMAIN}_shared"
+
 async def async_setup(hass, hass_config):
-    """Set up Generic Water Heaters."""
-    config = hass_config.get(DOMAIN)
-
-    # Build a single shared client so both platforms reuse one session, one
-    # login and one cached data fetch instead of authenticating separately.
-    salus = Salus(config[CONF_USERNAME], config[CONF_PASSWORD], config[CONF_ID])
-    hass.data.setdefault(DOMAIN, {})[config[CONF_ID]] = salus
-
-    if CLIMATE_DOMAIN in config[PLATFORMS]:
-        hass.async_create_task(
-            discovery.async_load_platform(
-                hass,
-                CLIMATE_DOMAIN,
-                DOMAIN,
-                config,
-                hass_config,
-            )
-        )
+    """Set up the Salus devices configured in YAML."""
+
+    async def async_get_history(call):
+        return _get_history(hass, call.data)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_HISTORY,
+        async_get_history,
+        schema=GET_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_apply_program(call):
+        await _async_apply_program(hass, call.data["steps"])
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_APPLY_PROGRAM, async_apply_program, schema=APPLY_PROGRAM_SCHEMA
+    )
+
+    configs = hass_config.get(DOMAIN)
+    if configs is None:
+        return True  # set up from config entries only
+
+    for config in configs:
+        await _async_setup_account(hass, config)
+
+        # Every platform reads the same coordinator data, so enabling more of
+        # them adds entities but no requests to salus-it500.com.
+        for platform in DEFAULT_PLATFORMS:
+            if platform in config[PLATFORMS]:
+                hass.async_create_task(
+                    discovery.async_load_platform(
+                        hass,
+                        platform,
+                        DOMAIN,
+                        config,
+                        hass_config,
+                    )
+                )
 
-    if WATER_HEATER_DOMAIN in config[PLATFORMS]:
-        hass.async_create_task(
-            discovery.async_load_platform(
-                hass,
-                WATER_HEATER_DOMAIN,
-                DOMAIN,
-                config,
-                hass_config,
-            )
-        )
-        
     return True
 
-class Salus:
-    """HTTP client for salus-it500.com, shared by all entities of one device.
 
-    Caches the session token and the most recent device-values fetch so that
-    the climate and water_heater entities reuse a single login and, most of
-    the time, a single read per cache window instead of calling out separately.
-    All public methods run in HA's executor (blocking I/O), so a lock guards
-    the shared token/data state against overlapping polls.
+async def async_setup_entry(hass, entry):
+    """Set up the Salus devices of a config entry."""
+    # Entries hold the same settings as YAML (options override data), so both
+    # paths share the schema's defaults and validation.
+    config = ACCOUNT_SCHEMA({**entry.data, **entry.options})
+    coordinator, async_unload = await _async_setup_account(hass, config)
+    entry.runtime_data = coordinator
+    _shared(hass)["unloads"][entry.entry_id] = async_unload
+
+    await hass.config_entries.async_forward_entry_setups(entry, config[PLATFORMS])
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    return True
+
+
+async def async_unload_entry(hass, entry):
+    """Unload a config entry, saving its login so the reload can reuse it."""
+    config = ACCOUNT_SCHEMA({**entry.data, **entry.options})
+    unloaded = await hass.config_entries.async_unload_platforms(entry, config[PLATFORMS])
+    if unloaded:
+        await _shared(hass)["unloads"].pop(entry.entry_id)()
+    return unloaded
+
+
+async def _async_update_listener(hass, entry):
+    """Apply changed options to the running account; no reload needed."""
+    config = ACCOUNT_SCHEMA({**entry.data, **entry.options})
+    _configure(entry.runtime_data, config)
+
+
+def _get_history(hass, data) -> dict:
+    """Answer get_history from the device's in-memory history."""
+    coordinator = hass.data.get(DOMAIN, {}).get(data[CONF_ID])
+    if coordinator is None:
+        raise HomeAssistantError(f"Unknown Salus device: {data[CONF_ID]}")
+
+    history = coordinator.account.devices[data[CONF_ID]].history
+    readings = history.query(time.time() - data["hours"] * 3600, data["resolution"] * 60)
+    for reading in readings:
+        reading["time"] = datetime.fromtimestamp(reading["time"], timezone.utc).isoformat()
+    return {"readings": readings}
+
+
+def _has_command(step):
+    if not {"temperature", "heating", "hot_water"} & step.keys():
+        raise vol.Invalid("a program step needs temperature, heating or hot_water")
+    return step
+
+
+SERVICE_APPLY_PROGRAM = "apply_program"
+APPLY_PROGRAM_SCHEMA = vol.Schema(
+    {
+        vol.Required("steps"): vol.All(
+            cv.ensure_list,
+            vol.Length(min=1),
+            [
+                vol.All(
+                    vol.Schema(
+                        {
+                            vol.Required(CONF_ID): cv.string,
+                            vol.Optional("temperature"): vol.All(
+                                vol.Coerce(float), vol.Range(min=MIN_TEMP, max=MAX_TEMP)
+                            ),
+                            vol.Optional("heating"): cv.boolean,
+                            vol.Optional("hot_water"): cv.boolean,
+                        }
+                    ),
+                    _has_command,
+                )
+            ],
+        ),
+    }
+)
+
+
+def _step_payload(step) -> dict:
+    """The set.php fields for one program step, as the entities send them."""
+    payload = {}
+    if "temperature" in step:
+        payload.update({"tempUnit": "0", "current_tempZ1_set": "1", "current_tempZ1": step["temperature"]})
+    if "heating" in step:
+        payload.update({"auto": "0" if step["heating"] else "1", "auto_setZ1": "1"})
+    if "hot_water" in step:
+        payload["hwmode_once" if step["hot_water"] else "hwmode_off"] = "1"
+    return payload
+
+
+async def _async_apply_program(hass, steps) -> None:
+    """Push every step of a validated program, merged into one POST per device.
+
+    All devices are checked before anything is sent. The steps are queued
+    in order before any is awaited, so each device's write queue merges them
+    (later steps win) and the account logs in at most once; the coordinator
+    then confirms the result with a single refresh.
+    """
+    devices = hass.data.get(DOMAIN, {})
+    unknown = sorted({step[CONF_ID] for step in steps} - devices.keys())
+    if unknown:
+        raise HomeAssistantError(f"Unknown Salus device: {', '.join(unknown)}")
+
+    writes = [
+        asyncio.ensure_future(devices[step[CONF_ID]].account.device(step[CONF_ID])._set_data(_step_payload(step)))
+        for step in steps
+    ]
+    results = await asyncio.gather(*writes, return_exceptions=True)
+    failed = sorted({step[CONF_ID] for step, result in zip(steps, results) if isinstance(result, Exception)})
+    if failed:
+        raise HomeAssistantError(f"Could not apply the program to: {', '.join(failed)}")
+
+
+def _configure(coordinator, config) -> None:
+    """Apply the tunable settings of ``config`` to a new or running account."""
+    coordinator.account.configure(
+        connect_timeout=config[CONF_CONNECT_TIMEOUT],
+        read_timeout=config[CONF_READ_TIMEOUT],
+        deadline=config[CONF_DEADLINE],
+        data_ttl=config[CONF_DATA_TTL].total_seconds(),
+        token_ttl=config[CONF_TOKEN_TTL].total_seconds(),
+    )
+    coordinator.configure(
+        config[CONF_FAST_SCAN_INTERVAL],
+        config[CONF_SCAN_INTERVAL],
+        config[CONF_MAX_SCAN_INTERVAL],
+    )
+
+
+class AccountStore:
+    """A .storage file holding one section per account, shared by all accounts.
+
+    Running accounts register a function exporting their section. Every save
+    writes all of them, plus the last known sections of accounts not running
+    right now, so accounts never overwrite each other's data.
+    """
+
+    def __init__(self, hass, key, delay):
+        self._store = Store(hass, STORAGE_VERSION, key)
+        self._delay = delay
+        self._data = None
+        self._lock = asyncio.Lock()
+        self._exporters = {}
+
+    async def async_load(self, username):
+        """The saved section of ``username``, or None."""
+        async with self._lock:
+            if self._data is None:
+                self._data = await self._store.async_load() or {}
+        return self._data.get(username)
+
+    def register(self, username, export) -> None:
+        self._exporters[username] = export
+
+    def _collect(self) -> dict:
+        for username, export in self._exporters.items():
+            self._data[username] = export()
+        return dict(self._data)
+
+    def async_delay_save(self) -> None:
+        self._store.async_delay_save(self._collect, self._delay)
+
+    async def async_unregister(self, username) -> None:
+        """Save the account's section a last time and stop exporting it."""
+        self._collect()
+        self._exporters.pop(username, None)
+        await self._store.async_save(dict(self._data))
+
+
+def _shared(hass) -> dict:
+    """The request scheduler and stores every account of this HA shares."""
+    if SHARED_DATA not in hass.data:
+        hass.data[SHARED_DATA] = {
+            "scheduler": FetchScheduler(FETCH_CONCURRENCY, STARTUP_STAGGER),
+            "auth": AccountStore(hass, STORAGE_KEY, STORAGE_SAVE_DELAY),
+            "snapshot": AccountStore(hass, STORAGE_SNAPSHOT_KEY, STORAGE_SNAPSHOT_SAVE_DELAY),
+            "unloads": {},  # config entry id -> teardown of its account
+        }
+    return hass.data[SHARED_DATA]
+
+
+async def _async_first_refresh(coordinator, delay) -> None:
+    if delay:
+        await asyncio.sleep(delay)
+    await coordinator.async_refresh()
+
+
+async def _async_setup_account(hass, config):
+    """Create the account and coordinator for one account's config.
+
+    Returns the coordinator and a coroutine function that tears them down
+    again: it stops the coordinator, sends queued writes, saves the login and
+    the last values right away and closes the session.
+    """
+    username = config[CONF_USERNAME]
+    shared = _shared(hass)
+
+    # Build a single shared account so every device and platform reuses one
+    # session and one login; each device then keeps its own token and cached
+    # data fetch. The session gets its own cookie jar (the Salus login is
+    # cookie based) but shares HA's pooled keep-alive connector, and requests
+    # take turns with the other accounts' on the shared scheduler.
+    session = async_create_clientsession(hass)
+    account = SalusAccount(username, config[CONF_PASSWORD], session=session, scheduler=shared["scheduler"])
+    for deviceId in config[CONF_ID]:
+        account.device(deviceId)
+
+    # One coordinator owns the fetch schedule for all devices of the account;
+    # entities only subscribe to it. Options changes reach both of them live.
+    coordinator = SalusCoordinator(hass, account)
+    _configure(coordinator, config)
+
+    # Pick up the login from before the restart so startup skips login.php and
+    # the control page scrape while they are still valid.
+    store = shared["auth"]
+    account.restore_state(await store.async_load(username))
+    store.register(username, account.export_state)
+    unsub_auth = account.async_add_auth_listener(store.async_delay_save)
+
+    # Entities start from the values saved before the restart (flagged stale)
+    # while the first refresh runs in the background.
+    snapshot_store = shared["snapshot"]
+    coordinator.restore_snapshot(account.restore_snapshot(await snapshot_store.async_load(username)))
+    snapshot_store.register(username, account.export_snapshot)
+    unsub_snapshot = coordinator.async_add_listener(snapshot_store.async_delay_save)
+    unload_history = None
+    if config[CONF_HISTORY_FILE]:
+        unload_history = await _async_setup_history_file(hass, coordinator)
+
+    for deviceId in config[CONF_ID]:
+        hass.data.setdefault(DOMAIN, {})[deviceId] = coordinator
+    # A restored login needs no login.php; others queue up for their turn.
+    delay = 0 if account._login_valid() else shared["scheduler"].start_delay()
+    first_refresh = hass.async_create_task(_async_first_refresh(coordinator, delay))
+
+    async def async_unload():
+        first_refresh.cancel()
+        unsub_auth()
+        unsub_snapshot()
+        await coordinator.async_shutdown()
+        # a command queued just before the unload still goes out on this session
+        await account.async_flush_writes()
+        for deviceId in config[CONF_ID]:
+            hass.data[DOMAIN].pop(deviceId, None)
+        await store.async_unregister(username)
+        await snapshot_store.async_unregister(username)
+        if unload_history is not None:
+            await unload_history()
+        await session.close()
+
+    return coordinator, async_unload
+
+async def _async_setup_history_file(hass, coordinator):
+    """Load each device's history from .storage and keep writing it back.
+
+    Files are written from the executor, at most every HISTORY_FLUSH_INTERVAL
+    while updates come in; the returned coroutine function writes them a last
+    time and stops.
+    """
+    devices = coordinator.account.devices
+    paths = {deviceId: hass.config.path(STORAGE_DIR, f"{DOMAIN}.history.{deviceId}") for deviceId in devices}
+
+    for deviceId, path in paths.items():
+        data = await hass.async_add_executor_job(_read_file, path)
+        if data is None:
+            continue
+        try:
+            devices[deviceId].history.load_bytes(data)
+        except ValueError as e:
+            _LOGGER.warning("Ignoring the history saved for %s: %s", deviceId, e)
+
+    last_flush = time.monotonic()
+    pending = None  # the periodic flush task, so two writes never share a .tmp file
+
+    async def flush():
+        # take the snapshot on the loop, write it in the executor
+        dumps = {path: devices[deviceId].history.to_bytes() for deviceId, path in paths.items()}
+        try:
+            await hass.async_add_executor_job(_write_files, dumps)
+        except OSError as e:
+            _LOGGER.warning("Could not save the Salus history: %s", e)
+
+    def maybe_flush():
+        nonlocal last_flush, pending
+        if time.monotonic() - last_flush >= HISTORY_FLUSH_INTERVAL and (pending is None or pending.done()):
+            last_flush = time.monotonic()
+            pending = hass.async_create_task(flush())
+
+    unsub = coordinator.async_add_listener(maybe_flush)
+
+    async def async_unload():
+        unsub()
+        if pending is not None:
+            await pending
+        await flush()
+
+    return async_unload
+
+
+def _read_file(path):
+    try:
+        with open(path, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_files(dumps) -> None:
+    for path, data in dumps.items():
+        temp = f"{path}.tmp"
+        with open(temp, "wb") as file:
+            file.write(data)
+        os.replace(temp, path)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling salus-it500.com while the circuit breaker is open."""
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by attempts and a total deadline.
+
+    Iterate ``attempts()`` and ``return`` on success; the loop simply ends once
+    the budget is spent. Before every attempt the account's circuit breaker is
+    consulted, and ``CircuitOpenError`` is raised while it is open.
+    """
+
+    def __init__(self, max_attempts=10, base_delay=0.5, max_delay=8.0, deadline=60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def delay(self, attempt) -> float:
+        """Sleep before retry ``attempt`` (1-based): uniform in [0, capped exponential]."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def attempts(self, breaker):
+        """Yield attempt numbers, sleeping between them, until the budget is spent.
+
+        Failed attempts are not reported to ``breaker``; wrap the whole call
+        in ``breaker.guard()`` so a call counts once, however often it retried.
+        """
+        start = time.monotonic()
+        for attempt in range(self.max_attempts):
+            if attempt:
+                delay = self.delay(attempt)
+                if time.monotonic() - start + delay > self.deadline:
+                    return
+                await asyncio.sleep(delay)
+            if not breaker.allow():
+                raise CircuitOpenError("salus-it500.com is failing; not retrying for now.")
+            yield attempt
+
+
+class CircuitBreaker:
+    """Stops calling the cloud after ``threshold`` consecutive failed calls.
+
+    A call fails once it ran out of retries or of its deadline. While open
+    every call fails fast. After ``reset_timeout`` the breaker is half-open:
+    a single call (the task that asks first) goes through as a probe while
+    the others keep failing fast; its success closes the breaker and its
+    failure re-opens it for another ``reset_timeout``.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=120.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at = None
+        self._probe = None  # task probing while half-open
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_timeout
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "open" if self.is_open else "half_open"
+
+    def allow(self) -> bool:
+        """Whether the current task may call out now."""
+        if self._opened_at is None:
+            return True
+        if self.is_open:
+            return False
+        # half-open: admit one probe; a probe that ended without a verdict
+        # (e.g. cancelled) hands over to the next caller
+        task = asyncio.current_task()
+        if self._probe is None or self._probe is task or self._probe.done():
+            self._probe = task
+            return True
+        return False
+
+    @contextmanager
+    def guard(self):
+        """Run one whole call; if it fails (other than by fast-failing) count one failure."""
+        try:
+            yield
+        except CircuitOpenError:
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            _LOGGER.info("salus-it500.com is answering again; closing the circuit breaker")
+        self.failures = 0
+        self._opened_at = None
+        self._probe = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe = None
+        if self.failures >= self.threshold and not self.is_open:
+            if self._opened_at is None:
+                _LOGGER.warning("salus-it500.com failed %s times in a row; backing off", self.failures)
+            self._opened_at = time.monotonic()
+
+
+class SalusAccount:
+    """One authenticated salus-it500.com session shared by every device of an account.
+
+    Owns the pooled aiohttp session and its login cookie, so logging in scales
+    with accounts rather than devices. Per-device clients are created lazily
+    through ``device()`` and scrape their own token from the control page.
+    All devices share the account's retry policy and circuit breaker, and
+    every request waits for a slot of the account's ``FetchScheduler``.
+
+    Every request carries connect/read timeouts, and every public call runs
+    inside an overall deadline (``retry.deadline``), so a hung connection can
+    never stall a device's reads or writes for longer than that.
     """
 
+    # Looked up on the instance, so a test or soak run can point one account
+    # at a stand-in server by overriding them (see tests/salus_server.py).
     LOGIN_URL = "https://salus-it500.com/public/login.php"
     CONTROL_URL = "https://salus-it500.com/public/control.php"
     VALUES_URL = "https://salus-it500.com/public/ajax_device_values.php"
     SET_URL = "https://salus-it500.com/includes/set.php"
 
-    def __init__(self, username, password, deviceId):
+    # Only used when no session or scheduler is handed in (e.g. outside of HA).
+    CONNECTION_LIMIT = 4
+    KEEPALIVE_TIMEOUT = 60  # seconds
+
+    def __init__(
+        self,
+        username,
+        password,
+        session=None,
+        connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT,
+        deadline=DEFAULT_DEADLINE,
+        data_ttl=DATA_TTL,
+        token_ttl=TOKEN_TTL,
+        scheduler=None,
+    ):
         self._username = username
         self._password = password
-        self._deviceId = deviceId
-        self._session = requests.Session()
-        self._lock = threading.Lock()
-        self._token = None
-        self._token_time = 0.0
-        self._data = None
-        self._data_time = 0.0
+        self._session = session
+        self._owns_session = session is None
+        self._lock = asyncio.Lock()
+        self._login_time = None
+        self._login_generation = 0  # bumped by every login; stale invalidations are ignored
+        self._write_listeners = []
+        self._auth_listeners = []
+        self.retry = RetryPolicy()
+        self.breaker = CircuitBreaker()
+        self.metrics = ClientMetrics()
+        # Requests of every account in HA share one scheduler; alone, the
+        # account just bounds its own requests like its connector would.
+        self.scheduler = scheduler if scheduler is not None else FetchScheduler(self.CONNECTION_LIMIT)
+        self.devices = {}
+        self.configure(connect_timeout, read_timeout, deadline, data_ttl, token_ttl)
 
-    def _token_valid(self) -> bool:
-        return self._token is not None and (time.monotonic() - self._token_time) < TOKEN_TTL
+    def configure(self, connect_timeout, read_timeout, deadline, data_ttl, token_ttl) -> None:
+        """Set the timeouts and cache lifetimes (seconds); takes effect with the next call."""
+        self.timeout = aiohttp.ClientTimeout(connect=connect_timeout, sock_read=read_timeout)
+        self.retry.deadline = deadline
+        self.data_ttl = data_ttl
+        self.token_ttl = token_ttl
+
+    def device(self, deviceId) -> "Salus":
+        """Return the client for ``deviceId``, creating it on first use."""
+        if deviceId not in self.devices:
+            self.devices[deviceId] = Salus(self, deviceId)
+        return self.devices[deviceId]
+
+    async def async_refresh(self) -> dict:
+        """Read every device concurrently; failures are returned, not raised."""
+        results = await asyncio.gather(
+            *(salus._get_data() for salus in self.devices.values()),
+            return_exceptions=True,
+        )
+        return dict(zip(self.devices, results))
+
+    def async_add_write_listener(self, listener):
+        """Call ``listener(deviceId)`` after every successful write; returns a remover."""
+        self._write_listeners.append(listener)
+        return lambda: self._write_listeners.remove(listener)
+
+    def _notify_write(self, deviceId) -> None:
+        for listener in list(self._write_listeners):
+            listener(deviceId)
+
+    def async_add_auth_listener(self, listener):
+        """Call ``listener()`` after every login or token scrape; returns a remover."""
+        self._auth_listeners.append(listener)
+        return lambda: self._auth_listeners.remove(listener)
+
+    def _notify_auth(self) -> None:
+        for listener in list(self._auth_listeners):
+            listener()
+
+    def export_state(self) -> dict:
+        """The login, device tokens and session cookies as JSON-safe data.
 
-    def _get_token(self) -> None:
-        """(Re)authenticate and scrape a fresh token. Caller must hold the lock."""
+        Times are stored as wall-clock timestamps so they survive a restart.
+        """
+        now, wall = time.monotonic(), time.time()
+        state = {"login_time": None, "cookies": [], "tokens": {}}
+        if not self._login_valid():
+            return state
+
+        state["login_time"] = wall - (now - self._login_time)
+        for deviceId, salus in self.devices.items():
+            if salus._token_valid() and salus._token_login == self._login_generation:
+                state["tokens"][deviceId] = {
+                    "token": salus._token,
+                    "time": wall - (now - salus._token_time),
+                }
+        if self._session is not None:
+            state["cookies"] = [
+                {"name": morsel.key, "value": morsel.value, "path": morsel["path"]}
+                for morsel in self._session.cookie_jar
+            ]
+        return state
+
+    def restore_state(self, state) -> None:
+        """Adopt a login saved by ``export_state`` if it is still within ``token_ttl``.
+
+        Nothing is checked against the cloud here: a restored login the server
+        no longer honours fails its first call, which triggers a normal re-login.
+        Tokens are only restored for devices already created through ``device()``.
+        """
+        if not state or state.get("login_time") is None:
+            return
+        now, wall = time.monotonic(), time.time()
+        age = wall - state["login_time"]
+        if not 0 <= age < self.token_ttl:
+            return
+
+        cookies = SimpleCookie()
+        for cookie in state.get("cookies", []):
+            cookies[cookie["name"]] = cookie["value"]
+            cookies[cookie["name"]]["path"] = cookie["path"] or "/"
+        self._get_session().cookie_jar.update_cookies(cookies, URL(self.LOGIN_URL))
+        self._login_time = now - age
+        self._login_generation += 1
+
+        for deviceId, saved in state.get("tokens", {}).items():
+            salus = self.devices.get(deviceId)
+            age = wall - saved["time"]
+            if salus is not None and 0 <= age < self.token_ttl:
+                salus._token = saved["token"]
+                salus._token_time = now - age
+                salus._token_login = self._login_generation
+
+    def export_snapshot(self) -> dict:
+        """The last values of every device with the wall-clock time they were read."""
+        return {
+            deviceId: {"values": salus._data.as_values(), "time": salus._data_wall}
+            for deviceId, salus in self.devices.items()
+            if salus._data is not None and salus._data_wall is not None
+        }
+
+    def restore_snapshot(self, snapshot) -> dict:
+        """Seed the device caches from ``export_snapshot`` data; returns the restored values.
+
+        Restored values are already expired, so the next read still goes to
+        the cloud, but entities have something to show until it lands.
+        """
+        restored = {}
+        for deviceId, saved in (snapshot or {}).items():
+            salus = self.devices.get(deviceId)
+            if salus is None or salus._data is not None:
+                continue
+            try:
+                salus._data = DeviceState.from_values(saved["values"])
+            except DeviceStateError:
+                continue
+            salus._data_time = time.monotonic() - self.data_ttl
+            salus._data_wall = saved["time"]
+            salus._stale = True
+            restored[deviceId] = salus._data
+        return restored
+
+    def diagnostics(self) -> dict:
+        """Client settings and health, for HA's diagnostics."""
+        return {
+            "connect_timeout": self.timeout.connect,
+            "read_timeout": self.timeout.sock_read,
+            "deadline": self.retry.deadline,
+            "data_ttl": self.data_ttl,
+            "token_ttl": self.token_ttl,
+            "retry_attempts": self.retry.max_attempts,
+            "breaker_state": self.breaker.state,
+            "breaker_failures": self.breaker.failures,
+            "logged_in": self._login_valid(),
+            "devices": list(self.devices),
+            "metrics": self.metrics.as_dict(),
+            "scheduler": self.scheduler.diagnostics(),
+        }
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the HTTP session, creating a pooled keep-alive one on first use."""
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.CONNECTION_LIMIT,
+                keepalive_timeout=self.KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def async_flush_writes(self) -> None:
+        """Send every device's queued write without waiting out the debounce."""
+        await asyncio.gather(*(salus.async_flush_writes() for salus in self.devices.values()))
+
+    async def async_close(self) -> None:
+        """Send queued writes, then close the HTTP session if this account created it."""
+        await self.async_flush_writes()
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _login_valid(self) -> bool:
+        return self._login_time is not None and (time.monotonic() - self._login_time) < self.token_ttl
+
+    def _invalidate_login(self, generation) -> None:
+        """Expire the login made at ``generation`` unless a newer one replaced it."""
+        if generation == self._login_generation:
+            self._login_time = None
+
+    async def _ensure_login(self) -> int:
+        """Log in unless the session is still fresh; returns the login generation.
+
+        Concurrent callers (e.g. several devices whose tokens expired together)
+        share a single login.
+        """
+        if not self._login_valid():
+            start = time.monotonic()
+            async with self._lock:
+                self.metrics.lock_wait.observe(time.monotonic() - start)
+                if not self._login_valid():
+                    await self._login()
+        return self._login_generation
+
+    async def _login(self) -> None:
+        """POST the credentials; the session cookie carries the login. Caller must hold the lock."""
         headers = {"content-type": "application/x-www-form-urlencoded"}
         payload = {
             "IDemail": self._username,
@@ -118,67 +804,369 @@ class Salus:
             "login": "Login",
             "keep_logged_in": "1",
         }
+        async with self._request("login", "post", self.LOGIN_URL, data=payload, headers=headers) as r:
+            await r.read()
+        if not 200 <= r.status < 300:
+            raise Exception(f"login.php answered {r.status}")
+        self.metrics.logins += 1
+        self._login_time = time.monotonic()
+        self._login_generation += 1
+        self._notify_auth()
 
-        for attempt in range(10):
-            try:
-                self._session.post(self.LOGIN_URL, data=payload, headers=headers)
-                page = self._session.get(self.CONTROL_URL, params={"devId": self._deviceId})
-                result = re.search('<input id="token" type="hidden" value="(.*)" />', page.text)
-                self._token = result.group(1)
-                self._token_time = time.monotonic()
-                return
-            except Exception:
-                self._token = None
-                _LOGGER.debug("Token fetch failed (attempt %s/10)", attempt + 1)
-
-        raise Exception("Error getting session token.")
-
-    def _get_data(self) -> object:
-        """Return device values, served from cache when still warm."""
-        with self._lock:
-            if self._data is not None and (time.monotonic() - self._data_time) < DATA_TTL:
-                return self._data
-
-            for attempt in range(10):
+    @asynccontextmanager
+    async def _call(self):
+        """Bound one read or write by the deadline; a failed one counts once with the breaker."""
+        with self.breaker.guard():
+            async with asyncio.timeout(self.retry.deadline):
+                yield
+
+    @asynccontextmanager
+    async def _request(self, endpoint, method, url, **kwargs):
+        """Send one timed request to ``endpoint`` once the scheduler grants a slot.
+
+        The slot is held until the block exits, so reading the body counts
+        against the limit too.
+        """
+        start = time.monotonic()
+        async with self.scheduler.slot(self):
+            self.metrics.slot_wait.observe(time.monotonic() - start)
+            with self.metrics.timed(endpoint):
+                async with getattr(self._get_session(), method)(url, timeout=self.timeout, **kwargs) as response:
+                    yield response
+
+
+class Salus:
+    """Async HTTP client for one iT500 device, shared by all of its entities.
+
+    Caches the device token and the most recent device-values fetch so that
+    the climate and water_heater entities reuse a single token and, most of
+    the time, a single read per cache window instead of calling out separately.
+    Every call runs on the event loop over the account's pooled aiohttp
+    session, so no executor thread is tied up while waiting on the cloud.
+
+    Reads are single-flight: callers arriving while a fetch is in progress
+    await that same fetch instead of queueing behind it. Writes never block
+    readers; once a write lands its known effects are patched into the cached
+    values (see ``COMMAND_EFFECTS``) and write listeners are notified, so the
+    new state shows at once and the next scheduled read confirms it. The lock
+    serializes token scrapes only.
+
+    Writes are debounced: commands queued within ``WRITE_DEBOUNCE`` of each
+    other (but never held longer than ``WRITE_MAX_DELAY``) are merged into a
+    single set.php POST, later values winning, and every caller awaits that POST.
+    """
+
+    WRITE_DEBOUNCE = 0.5   # seconds
+    WRITE_MAX_DELAY = 2.0  # seconds
+    # set.php keys that contradict each other; queuing one drops the others.
+    EXCLUSIVE_COMMANDS = (
+        frozenset({"hwmode_once", "hwmode_off"}),
+    )
+    # How each set.php key shows up in the DeviceState once it landed.
+    COMMAND_EFFECTS = {
+        "current_tempZ1": lambda value: {"target_temperature": float(value)},
+        "auto": lambda value: {"heating_off": str(value) == "1"},
+        "hwmode_once": lambda value: {"hot_water": True},
+        "hwmode_off": lambda value: {"hot_water": False},
+    }
+
+    def __init__(self, account, deviceId):
+        self._account = account
+        self._deviceId = deviceId
+        self.history = History(HISTORY_SIZE)  # every confirmed read, for get_history
+        self._lock = asyncio.Lock()
+        self._token = None
+        self._token_time = 0.0
+        self._token_login = None  # account login generation the token was scraped under
+        self._data = None
+        self._data_time = 0.0
+        self._data_wall = None  # wall-clock time of the last read from the cloud
+        self._stale = False     # _data was served without being confirmed by a read
+        self._fingerprint = None  # digest of the last values body ...
+        self._body_state = None   # ... and the state parsed from it (unpatched)
+        self._fetch = None      # in-flight values fetch shared by all readers
+        self._generation = 0    # bumped by every write; stale fetches aren't cached
+        self._pending = None         # merged payload of the queued write
+        self._pending_future = None  # resolves when the queued write lands
+        self._pending_since = 0.0
+        self._flush_handle = None
+        self._pushes = set()         # push tasks in flight
+        self._last_push = None       # the newest of them; the next push waits for it
+
+    def _token_valid(self) -> bool:
+        return self._token is not None and (time.monotonic() - self._token_time) < self._account.token_ttl
+
+    def _session_expired(self, token) -> None:
+        """A call made with ``token`` got a logged-out answer: drop token and login."""
+        if self._token == token:
+            self._token = None
+            self._account._invalidate_login(self._token_login)
+
+    async def _ensure_token(self) -> str:
+        """Return a valid token, scraping at most once for concurrent callers."""
+        if not self._token_valid():
+            start = time.monotonic()
+            async with self._lock:
+                self._account.metrics.lock_wait.observe(time.monotonic() - start)
+                if not self._token_valid():
+                    await self._get_token()
+        return self._token
+
+    async def _get_token(self) -> None:
+        """Scrape a fresh token, logging the account in first if needed. Caller must hold the lock.
+
+        Tries once: a failure fails the attempt of the read or write that
+        needed the token, whose retry loop backs off before the next try.
+        """
+        account = self._account
+        self._token = None
+
+        generation = await account._ensure_login()
+        async with account._request(
+            "control", "get", account.CONTROL_URL, params={"devId": self._deviceId}
+        ) as page:
+            if not 200 <= page.status < 300:
+                raise Exception(f"control.php answered {page.status}")
+            token = await _read_token(page.content)
+        if not token:
+            account._invalidate_login(generation)  # a page without a token means logged out
+            raise Exception("No token on the control page.")
+        account.metrics.token_refreshes += 1
+        self._token = token
+        self._token_time = time.monotonic()
+        self._token_login = generation
+        account._notify_auth()
+
+    async def _get_data(self) -> DeviceState:
+        """Return device values, served from cache when still warm.
+
+        Concurrent callers share one in-flight fetch. The fetch is shielded, so
+        a caller being cancelled does not abort it for everybody else. While
+        the circuit breaker is open the last values are served as stale.
+        """
+        metrics = self._account.metrics
+        if self._data is not None and (time.monotonic() - self._data_time) < self._account.data_ttl:
+            metrics.cache_hits += 1
+            return self._data
+
+        metrics.cache_misses += 1
+        if self._fetch is None:
+            self._fetch = asyncio.ensure_future(self._fetch_data())
+            self._fetch.add_done_callback(self._fetch_done)
+        else:
+            metrics.cache_joins += 1
+        try:
+            return await asyncio.shield(self._fetch)
+        except CircuitOpenError:
+            if self._data is None:
+                raise
+            self._stale = True
+            return self._data
+
+    def _fetch_done(self, fetch) -> None:
+        if self._fetch is fetch:
+            self._fetch = None
+        _consume_result(fetch)
+
+    async def _fetch_data(self) -> DeviceState:
+        """Fetch device values from the cloud, retrying with a fresh login on failure.
+
+        The whole fetch, token scrape and retries included, is bounded by the
+        account's deadline; running out of it raises ``TimeoutError``.
+        """
+        generation = self._generation
+        account = self._account
+
+        async with account._call():
+            async for attempt in account.retry.attempts(account.breaker):
+                if attempt:
+                    account.metrics.retries["values"] += 1
+                token = None
                 try:
-                    if not self._token_valid():
-                        self._get_token()
+                    token = await self._ensure_token()
 
                     params = {
                         "devId": self._deviceId,
-                        "token": self._token,
+                        "token": token,
                         "&_": str(int(round(time.time() * 1000))),
                     }
-                    r = self._session.get(self.VALUES_URL, params=params)
-                    data = json.loads(r.text)  # raises if the session expired (non-JSON body)
+                    async with account._request("values", "get", account.VALUES_URL, params=params) as r:
+                        body = await r.read()
+                    if not 200 <= r.status < 300:
+                        raise Exception(f"ajax_device_values.php answered {r.status}")
+                    if not is_values_body(body):
+                        # logged out: the site answered with its HTML page
+                        self._session_expired(token)
+                        _LOGGER.debug("Session expired reading data (attempt %s)", attempt + 1)
+                        continue
+                    # An unchanged body yields the very same state object: no re-parse,
+                    # and listeners can tell nothing changed by identity.
+                    fingerprint = hashlib.blake2b(body, digest_size=16).digest()
+                    if fingerprint == self._fingerprint:
+                        data = self._body_state
+                    else:
+                        # raises if the values are malformed
+                        data = DeviceState.from_body(body)
+                        self._fingerprint, self._body_state = fingerprint, data
+                    account.breaker.record_success()
 
+                    # A write that landed meanwhile makes this read stale: don't
+                    # cache it, and prefer the write-patched values if we have them.
+                    if generation != self._generation:
+                        return self._data if self._data is not None else data
                     self._data = data
                     self._data_time = time.monotonic()
+                    self._data_wall = time.time()
+                    self._stale = False
+                    self.history.append(self._data_wall, data)
                     return data
+                except CircuitOpenError:
+                    raise
                 except Exception:
-                    self._token = None  # force re-auth on the next attempt
-                    _LOGGER.debug("Data fetch failed (attempt %s/10)", attempt + 1)
+                    # errors and timeouts only back off; the login is kept
+                    _LOGGER.debug("Data fetch failed (attempt %s)", attempt + 1)
 
             raise Exception(
                 "Error getting data from the web. Please check the connection to salus-it500.com manually."
             )
 
-    def _set_data(self, data) -> bool:
-        """Push a config change, then invalidate the cache so the next read is fresh."""
-        with self._lock:
-            headers = {"content-type": "application/x-www-form-urlencoded"}
+    async def _set_data(self, data) -> bool:
+        """Queue a config change; resolves once the POST carrying it has landed."""
+        loop = asyncio.get_running_loop()
+        if self._pending is None:
+            self._pending = {}
+            self._pending_future = loop.create_future()
+            self._pending_future.add_done_callback(_consume_result)
+            self._pending_since = loop.time()
+
+        for group in self.EXCLUSIVE_COMMANDS:
+            if group & data.keys():
+                for key in group - data.keys():
+                    self._pending.pop(key, None)
+        self._pending.update(data)
+
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        deadline = self._pending_since + self.WRITE_MAX_DELAY
+        delay = max(0.0, min(self.WRITE_DEBOUNCE, deadline - loop.time()))
+        self._flush_handle = loop.call_later(delay, self._flush_writes)
+
+        return await asyncio.shield(self._pending_future)
+
+    def _flush_writes(self) -> None:
+        """Hand the merged payload to a push task and start a fresh queue.
+
+        Pushes of one device go out one after the other: a push still retrying
+        must not land after a newer one and overwrite its values.
+        """
+        payload, future = self._pending, self._pending_future
+        self._pending = self._pending_future = self._flush_handle = None
+        previous = self._last_push
+
+        async def push():
+            try:
+                if previous is not None:
+                    await asyncio.wait({previous})  # its outcome goes to its own callers
+                future.set_result(await self._push_data(payload))
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+
+        task = self._last_push = asyncio.ensure_future(push())
+        self._pushes.add(task)
+        task.add_done_callback(self._pushes.discard)
 
-            for attempt in range(10):
+    async def async_flush_writes(self) -> None:
+        """Send the queued write now and wait for every push in flight."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_writes()
+        if self._pushes:
+            await asyncio.gather(*self._pushes, return_exceptions=True)
+
+    async def _push_data(self, data) -> bool:
+        """Push a config change, then patch its effects into the cached values.
+
+        Only a 2xx answer that is not the logged-out page counts as landed;
+        anything else is a failed attempt and changes nothing locally.
+        """
+        account = self._account
+        headers = {"content-type": "application/x-www-form-urlencoded"}
+
+        async with account._call():
+            async for attempt in account.retry.attempts(account.breaker):
+                if attempt:
+                    account.metrics.retries["set"] += 1
+                token = None
                 try:
-                    if not self._token_valid():
-                        self._get_token()
+                    token = await self._ensure_token()
 
-                    payload = {"token": self._token, "devId": self._deviceId, **data}
-                    self._session.post(self.SET_URL, data=payload, headers=headers)
-                    self._data = None  # device state changed; drop the cached read
+                    payload = {"token": token, "devId": self._deviceId, **data}
+                    async with account._request(
+                        "set", "post", account.SET_URL, data=payload, headers=headers
+                    ) as r:
+                        body = await r.read()
+                    if not 200 <= r.status < 300:
+                        raise Exception(f"set.php answered {r.status}")
+                    if LOGIN_PAGE_RE.match(body):
+                        # logged out: the command was dropped; log in again and resend
+                        self._session_expired(token)
+                        _LOGGER.debug("Session expired pushing config (attempt %s)", attempt + 1)
+                        continue
+                    account.breaker.record_success()
+                    self._apply_write(data)
+                    account._notify_write(self._deviceId)
                     return True
+                except CircuitOpenError:
+                    raise
                 except Exception:
-                    self._token = None
-                    _LOGGER.debug("Config push failed (attempt %s/10)", attempt + 1)
+                    _LOGGER.debug("Config push failed (attempt %s)", attempt + 1)
+
+            raise Exception("Error while pushing config.")
+
+    def _apply_write(self, data) -> None:
+        """Patch the cached values with a landed command and detach older fetches.
 
-            raise Exception("Error while pushing config.")
\ No newline at end of file
+        Without a cached read there is nothing to patch; the next read is then
+        a fresh one anyway.
+        """
+        self._generation += 1
+        self._fetch = None
+        if self._data is None:
+            return
+
+        changes = {}
+        for key, value in data.items():
+            effect = self.COMMAND_EFFECTS.get(key)
+            if effect is not None:
+                changes.update(effect(value))
+        self._data = dataclasses.replace(self._data, **changes)
+        self._data_time = time.monotonic()
+
+def _consume_result(future) -> None:
+    """Mark a shared future's exception as retrieved even if every waiter went away."""
+    if not future.cancelled():
+        future.exception()
+
+
+async def _read_token(content) -> str:
+    """Stream the control page until the token input shows up; None if it never does.
+
+    Only the bytes up to the token are read and nothing is decoded but the
+    token itself. Leaving the rest unread means aiohttp closes the connection
+    instead of pooling it, which is cheaper than downloading the whole page on
+    the rare re-auth.
+    """
+    buffer = b""
+    async for chunk in content.iter_chunked(TOKEN_CHUNK_SIZE):
+        buffer += chunk
+        tag = TOKEN_INPUT_RE.search(buffer)
+        if tag is not None:
+            value = TOKEN_VALUE_RE.search(tag.group(0))
+            return value.group(2).decode() if value is not None else None
+        # keep only a trailing, still unterminated tag for the next chunk
+        start = buffer.rfind(b"<")
+        buffer = buffer[start:][-TOKEN_MAX_TAG:] if start != -1 and b">" not in buffer[start:] else b""
+    return None
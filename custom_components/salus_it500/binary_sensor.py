@@ -0,0 +1,92 @@
+"""
+Adds heating and hot water status sensors for the Salus units.
+
+The sensors read the values the coordinator already fetched for the climate
+and water heater entities, so they cost no extra requests.
+"""
+import logging
+
+from homeassistant.const import CONF_ID
+
+from homeassistant.components.binary_sensor import (
+    BinarySensorDeviceClass,
+    BinarySensorEntity,
+)
+
+from homeassistant.helpers.device_registry import DeviceInfo
+from .const import DOMAIN
+from .entity import SalusEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+# (DeviceState field, name, entity the sensor is grouped under, device class)
+BINARY_SENSORS = (
+    ("heating", "Salus heating", "thermostat", BinarySensorDeviceClass.HEAT),
+    ("hot_water", "Salus hot water", "water_heater", BinarySensorDeviceClass.RUNNING),
+)
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    await async_setup_platform(hass, None, async_add_entities, {CONF_ID: entry.data[CONF_ID]})
+
+
+async def async_setup_platform(hass, hass_config, async_add_entities, discovery_info=None):
+    if discovery_info != None:
+        deviceIds = discovery_info[CONF_ID]
+
+        async_add_entities(
+            [
+                SalusBinarySensor(
+                    name if len(deviceIds) == 1 else f"{name} {deviceId}",
+                    hass.data[DOMAIN][deviceId],
+                    deviceId,
+                    field,
+                    parent,
+                    device_class,
+                )
+                for deviceId in deviceIds
+                for field, name, parent, device_class in BINARY_SENSORS
+            ]
+        )
+
+
+class SalusBinarySensor(SalusEntity, BinarySensorEntity):
+    """Whether a Salus unit is currently heating or making hot water."""
+
+    def __init__(self, name, coordinator, deviceId, field, parent, device_class):
+        super().__init__(coordinator)
+        self._deviceId = deviceId
+        self._field = field
+        self._parent = parent
+        self.STATE_FIELDS = frozenset({field})
+        self._attr_unique_id = f"salus_it500_{deviceId}_{field}_status"
+        self._attr_name = name
+        self._attr_device_class = device_class
+        self._attr_available = False
+        self._attr_is_on = None
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        # Group the sensor under the thermostat's or water heater's device.
+        return DeviceInfo(
+            identifiers={(DOMAIN, f"salus_it500_{self._deviceId}_{self._parent}")},
+            manufacturer="Salus",
+            model="IT500",
+        )
+
+    @property
+    def should_poll(self):
+        return False
+
+    @property
+    def available(self):
+        return super().available and self._attr_available
+
+    @property
+    def extra_state_attributes(self):
+        return {"stale": self._deviceId in self.coordinator.stale}
+
+    def get_data(self, data):
+        state = data.get(self._deviceId) if data else None
+        value = getattr(state, self._field) if state is not None else None
+        self._attr_is_on = value
+        self._attr_available = value is not None
@@ -2,7 +2,6 @@
 Adds support for the Salus Thermostat units.
 """
 import logging
-from datetime import timedelta
 
 from homeassistant.components.climate.const import (
     HVACAction,
@@ -17,38 +16,49 @@ from homeassistant.const import (
     UnitOfTemperature,
 )
 
-from homeassistant.helpers.reload import async_setup_reload_service
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.components.climate import ClimateEntity
-from . import DOMAIN
+from .const import DOMAIN, MIN_TEMP, MAX_TEMP
+from .entity import SalusEntity
 
 _LOGGER = logging.getLogger(__name__)
 
 # Values from web interface
-MIN_TEMP = 5
-MAX_TEMP = 34.5
-
 SUPPORT_FLAGS = ClimateEntityFeature.TARGET_TEMPERATURE
-SCAN_INTERVAL = timedelta(minutes=10)
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    await async_setup_platform(hass, None, async_add_entities, {CONF_ID: entry.data[CONF_ID]})
+
 
 async def async_setup_platform(hass, hass_config, async_add_entities, discovery_info=None):
     name = "Salus thermostat"
 
     if discovery_info != None:
-        deviceId = discovery_info[CONF_ID]
-        salus = hass.data[DOMAIN][deviceId]
+        deviceIds = discovery_info[CONF_ID]
 
         async_add_entities(
-            [SalusThermostat(hass, name, salus, deviceId)]
+            [
+                SalusThermostat(
+                    hass,
+                    name if len(deviceIds) == 1 else f"{name} {deviceId}",
+                    hass.data[DOMAIN][deviceId],
+                    deviceId,
+                )
+                for deviceId in deviceIds
+            ]
         )
 
 
-class SalusThermostat(ClimateEntity):
+class SalusThermostat(SalusEntity, ClimateEntity):
     """Representation of a Salus Thermostat device."""
 
-    def __init__(self, hass, name, salus, deviceId):
+    STATE_FIELDS = frozenset({"target_temperature", "room_temperature", "heating", "heating_off"})
+
+    def __init__(self, hass, name, coordinator, deviceId):
         """Initialize the thermostat."""
-        self._salus = salus
+        super().__init__(coordinator)
+        self._salus = coordinator.account.device(deviceId)
+        self._deviceId = deviceId
         self._attr_unique_id=f"salus_it500_{deviceId}_thermostat"
         self._attr_available = False
         self._hass = hass
@@ -82,7 +92,17 @@ class SalusThermostat(ClimateEntity):
 
     @property
     def should_poll(self):
-        return True
+        return False
+
+    @property
+    def available(self):
+        return super().available and self._attr_available
+
+    @property
+    def extra_state_attributes(self):
+        # Values that change with every read (last read, poll interval, time to
+        # target) are sensors of their own, so a read alone writes no state here.
+        return {"stale": self._deviceId in self.coordinator.stale}
 
     @property
     def min_temp(self):
@@ -128,55 +148,42 @@ class SalusThermostat(ClimateEntity):
         
         return HVACAction.IDLE
 
-    def set_temperature(self, **kwargs):
+    async def async_set_temperature(self, **kwargs):
         temperature = kwargs.get(ATTR_TEMPERATURE)
         
         if temperature is None:
             return
 
         try:
-            if self._salus._set_data({"tempUnit": "0", "current_tempZ1_set": "1", "current_tempZ1": temperature}):
+            if await self._salus._set_data({"tempUnit": "0", "current_tempZ1_set": "1", "current_tempZ1": temperature}):
                 self._target_temperature = temperature
         except Exception as e:
-            _LOGGER.error("Error Setting the temperature.", e)
+            _LOGGER.error("Error Setting the temperature: %s", e)
         
 
-    def set_hvac_mode(self, hvac_mode):
+    async def async_set_hvac_mode(self, hvac_mode):
         if hvac_mode == HVACMode.OFF:
             try:
-                if self._salus._set_data({"auto": "1", "auto_setZ1": "1"}):
+                if await self._salus._set_data({"auto": "1", "auto_setZ1": "1"}):
                     self._current_operation_mode = STATE_OFF
             except Exception as e:
-                _LOGGER.error("Error Setting HVAC mode OFF.", e)
+                _LOGGER.error("Error Setting HVAC mode OFF: %s", e)
         elif hvac_mode == HVACMode.HEAT:
             try:
-                if self._salus._set_data({"auto": "0", "auto_setZ1": "1"}):
+                if await self._salus._set_data({"auto": "0", "auto_setZ1": "1"}):
                     self._current_operation_mode = STATE_ON
             except Exception as e:
-                _LOGGER.error("Error Setting HVAC mode HEAT.", e)
-
-    async def get_data(self):
-        try: 
-            data = await self._hass.async_add_executor_job(self._salus._get_data)
-
-            self._target_temperature = float(data["CH1currentSetPoint"])
-            self._current_temperature = float(data["CH1currentRoomTemp"])
-            self._frost = float(data["frost"])
-                        
-            if data['CH1heatOnOffStatus'] == "1":
-                self._status = "ON"
-            else:
-                self._status = "OFF"
-
-            if data['CH1heatOnOff'] == "1":
-                self._current_operation_mode = STATE_OFF
-            else:
-                self._current_operation_mode = STATE_ON
+                _LOGGER.error("Error Setting HVAC mode HEAT: %s", e)
 
-            self._attr_available = True
-        except Exception as e:
-            _LOGGER.error(e)
-
-    async def async_update(self) -> None:
-        await self.get_data()
+    def get_data(self, data):
+        state = data.get(self._deviceId) if data else None
+        if state is None or state.target_temperature is None or state.room_temperature is None:
+            self._attr_available = False
+            return
 
+        self._target_temperature = state.target_temperature
+        self._current_temperature = state.room_temperature
+        self._frost = state.frost_temperature
+        self._status = "ON" if state.heating else "OFF"
+        self._current_operation_mode = STATE_OFF if state.heating_off else STATE_ON
+        self._attr_available = True
@@ -0,0 +1,141 @@
+"""Config flow for the Salus iT500 component."""
+import logging
+
+import voluptuous as vol
+
+from homeassistant import config_entries
+from homeassistant.const import CONF_ID, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import callback
+
+from .const import (
+    DOMAIN,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_DATA_TTL,
+    CONF_TOKEN_TTL,
+    CONF_CONNECT_TIMEOUT,
+    CONF_READ_TIMEOUT,
+    CONF_DEADLINE,
+)
+from . import RetryPolicy, SalusAccount
+from .schema import ACCOUNT_SCHEMA
+
+_LOGGER = logging.getLogger(__name__)
+
+USER_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_USERNAME): str,
+        vol.Required(CONF_PASSWORD): str,
+        # comma separated, for accounts with several devices
+        vol.Required(CONF_ID): str,
+    }
+)
+
+
+def _device_ids(value):
+    return [deviceId.strip() for deviceId in value.split(",") if deviceId.strip()]
+
+
+async def _async_validate(username, password, deviceIds):
+    """Log in and read every device once; returns an error key, or None if all went well."""
+    # A throwaway account with its own session, failing fast instead of
+    # retrying for a minute while the user waits on the form.
+    account = SalusAccount(username, password)
+    account.retry = RetryPolicy(max_attempts=2, base_delay=0.5, deadline=15)
+    try:
+        for deviceId in deviceIds:
+            await account.device(deviceId)._get_data()
+    except Exception as e:
+        _LOGGER.debug("Validating the Salus login failed: %s", e)
+        # Requests that went through but found no token mean the site did not
+        # accept the login or the device id; failed requests mean no connection.
+        return "cannot_connect" if any(account.metrics.errors.values()) else "invalid_auth"
+    finally:
+        await account.async_close()
+    return None
+
+
+class SalusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
+    """Ask for the salus-it500.com login and the device ids."""
+
+    VERSION = 1
+
+    async def async_step_user(self, user_input=None):
+        errors = {}
+        if user_input is not None:
+            deviceIds = _device_ids(user_input[CONF_ID])
+            await self.async_set_unique_id(user_input[CONF_USERNAME].lower())
+            self._abort_if_unique_id_configured()
+
+            if not deviceIds:
+                errors[CONF_ID] = "no_devices"
+            else:
+                error = await _async_validate(user_input[CONF_USERNAME], user_input[CONF_PASSWORD], deviceIds)
+                if error is not None:
+                    errors["base"] = error
+                else:
+                    return self.async_create_entry(
+                        title=user_input[CONF_USERNAME],
+                        data={
+                            CONF_USERNAME: user_input[CONF_USERNAME],
+                            CONF_PASSWORD: user_input[CONF_PASSWORD],
+                            CONF_ID: deviceIds,
+                        },
+                    )
+
+        return self.async_show_form(
+            step_id="user",
+            data_schema=self.add_suggested_values_to_schema(USER_SCHEMA, user_input),
+            errors=errors,
+        )
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return SalusOptionsFlow()
+
+
+def _seconds(value):
+    return value.total_seconds() if hasattr(value, "total_seconds") else value
+
+
+class SalusOptionsFlow(config_entries.OptionsFlow):
+    """Poll intervals, cache lifetimes and timeouts, applied without a reload."""
+
+    async def async_step_init(self, user_input=None):
+        errors = {}
+        if user_input is not None:
+            try:
+                ACCOUNT_SCHEMA({**self.config_entry.data, **user_input})
+            except vol.Invalid as e:
+                _LOGGER.debug("Rejected options: %s", e)
+                errors["base"] = "invalid_intervals"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        # current values, in seconds (the schema fills in the defaults)
+        current = ACCOUNT_SCHEMA({**self.config_entry.data, **self.config_entry.options})
+        seconds = vol.All(vol.Coerce(int), vol.Range(min=1))
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    **{
+                        vol.Optional(key, default=int(_seconds(current[key]))): seconds
+                        for key in (
+                            CONF_FAST_SCAN_INTERVAL,
+                            CONF_SCAN_INTERVAL,
+                            CONF_MAX_SCAN_INTERVAL,
+                            CONF_DATA_TTL,
+                            CONF_TOKEN_TTL,
+                        )
+                    },
+                    **{
+                        vol.Optional(key, default=current[key]): vol.All(vol.Coerce(float), vol.Range(min=1))
+                        for key in (CONF_CONNECT_TIMEOUT, CONF_READ_TIMEOUT, CONF_DEADLINE)
+                    },
+                }
+            ),
+            errors=errors,
+        )
@@ -0,0 +1,72 @@
+"""Constants for the Salus iT500 component."""
+from datetime import timedelta
+
+from homeassistant.components.climate import DOMAIN as CLIMATE_DOMAIN
+from homeassistant.components.water_heater import DOMAIN as WATER_HEATER_DOMAIN
+from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
+from homeassistant.components.binary_sensor import DOMAIN as BINARY_SENSOR_DOMAIN
+
+DOMAIN = "salus_it500"
+PLATFORMS = "platforms"
+DEFAULT_PLATFORMS = [CLIMATE_DOMAIN, WATER_HEATER_DOMAIN, SENSOR_DOMAIN, BINARY_SENSOR_DOMAIN]
+
+CONF_FAST_SCAN_INTERVAL = "fast_scan_interval"
+CONF_SCAN_INTERVAL = "scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+CONF_DATA_TTL = "data_ttl"
+CONF_TOKEN_TTL = "token_ttl"
+CONF_HISTORY_FILE = "history_file"
+CONF_CONNECT_TIMEOUT = "connect_timeout"
+CONF_READ_TIMEOUT = "read_timeout"
+CONF_DEADLINE = "deadline"
+
+# Set point range the thermostat accepts.
+MIN_TEMP = 5
+MAX_TEMP = 34.5
+
+# A single fetch of ajax_device_values.php carries both the thermostat (CH1*)
+# and water heater (HW*) data, so one coordinator per account polls it on one
+# schedule and pushes the result to every entity. The schedule adapts: fast
+# right after a command or while the room heads for the setpoint, the base
+# interval on other changes, and backing off towards the ceiling when stable.
+# These are the defaults of fast_scan_interval, scan_interval and max_scan_interval.
+FAST_UPDATE_INTERVAL = timedelta(seconds=30)
+UPDATE_INTERVAL = timedelta(minutes=2)
+DEFAULT_MAX_SCAN_INTERVAL = timedelta(minutes=15)
+UPDATE_BACKOFF = 1.5
+# How long after a command the coordinator keeps polling fast.
+WRITE_WINDOW = timedelta(minutes=5)
+# The client still caches a fetch briefly so back-to-back refresh requests
+# share it. data_ttl must stay below fast_scan_interval so each scheduled
+# poll is a real read.
+DATA_TTL = 25           # seconds, default of data_ttl
+# Refresh the session token proactively instead of only after a call fails.
+TOKEN_TTL = 30 * 60    # seconds, default of token_ttl
+
+# Every request gets connect/read timeouts; every read or write, retries
+# included, must finish within the deadline.
+DEFAULT_CONNECT_TIMEOUT = 10  # seconds
+DEFAULT_READ_TIMEOUT = 20     # seconds
+DEFAULT_DEADLINE = 60         # seconds
+
+# Requests of all configured accounts share this many slots, taken in turns,
+# and accounts that must log in start their first refresh this far apart.
+FETCH_CONCURRENCY = 4
+STARTUP_STAGGER = 5  # seconds
+
+# Every read is kept in a per-device ring buffer for the get_history service:
+# three days at the fastest poll, longer while polling backs off. With
+# history_file enabled it is also written to .storage at most this often.
+HISTORY_SIZE = 8640
+HISTORY_FLUSH_INTERVAL = 60 * 60  # seconds
+# How far back and how coarse get_history answers by default.
+DEFAULT_HISTORY_HOURS = 24
+DEFAULT_HISTORY_RESOLUTION = 15  # minutes
+
+# Login, tokens and cookies are kept in .storage so a restart can skip logging in.
+STORAGE_KEY = f"{DOMAIN}.auth"
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10  # seconds
+# The last values read per device, shown (flagged stale) right after a restart.
+STORAGE_SNAPSHOT_KEY = f"{DOMAIN}.snapshot"
+STORAGE_SNAPSHOT_SAVE_DELAY = 60  # seconds
@@ -0,0 +1,243 @@
+"""Polling coordinator shared by all devices and entities of one Salus account."""
+import dataclasses
+import logging
+import time
+from datetime import timedelta
+
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .heating import HeatingRateModel
+from .models import DeviceState
+from .const import (
+    DOMAIN,
+    FAST_UPDATE_INTERVAL,
+    UPDATE_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    UPDATE_BACKOFF,
+    WRITE_WINDOW,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _reading(state):
+    """The fields that drive the poll schedule, as a comparable tuple."""
+    return (
+        state.room_temperature,
+        state.target_temperature,
+        state.heating,
+        state.hot_water,
+    )
+
+
+ALL_FIELDS = frozenset(f.name for f in dataclasses.fields(DeviceState)) | {"stale"}
+
+
+def _changed_fields(previous, current) -> frozenset:
+    """Names of the DeviceState fields that differ; all of them if either is missing."""
+    if previous is None or current is None:
+        return ALL_FIELDS
+    if previous is current:
+        return frozenset()
+    return frozenset(
+        f.name for f in dataclasses.fields(current) if getattr(previous, f.name) != getattr(current, f.name)
+    )
+
+
+def _converging(previous, current) -> bool:
+    """True while the room temperature moves towards an unchanged setpoint."""
+    prev_temp, prev_set = previous[0], previous[1]
+    temp, setpoint = current[0], current[1]
+    if None in (prev_temp, temp, setpoint) or setpoint != prev_set:
+        return False
+    return abs(setpoint - temp) < abs(setpoint - prev_temp)
+
+
+class AdaptiveInterval:
+    """Picks the next poll interval from recent writes and how readings evolve.
+
+    Polls fast for ``write_window`` after a command and while a room is heading
+    for its setpoint, at ``base`` when something else changed, and multiplies
+    the interval by ``backoff`` up to ``ceiling`` while readings stay stable.
+    When the heating model predicts when a converging room reaches its
+    setpoint, the next poll is aimed one fast interval before that instead.
+    """
+
+    def __init__(
+        self,
+        fast=FAST_UPDATE_INTERVAL,
+        base=UPDATE_INTERVAL,
+        ceiling=DEFAULT_MAX_SCAN_INTERVAL,
+        write_window=WRITE_WINDOW,
+        backoff=UPDATE_BACKOFF,
+    ):
+        self.write_window = write_window
+        self.backoff = backoff
+        self.interval = base
+        self._last_write = None
+        self._readings = {}
+        self.configure(fast, base, ceiling)
+
+    def configure(self, fast, base, ceiling):
+        """Change the intervals; the current one is kept within the new bounds."""
+        self.fast = fast
+        self.base = base
+        self.ceiling = max(ceiling, base)
+        self.interval = min(max(self.interval, fast), self.ceiling)
+        return self.interval
+
+    def note_write(self):
+        """A command was sent: poll fast until the device has settled."""
+        self._last_write = time.monotonic()
+        self.interval = self.fast
+        return self.interval
+
+    def _recent_write(self) -> bool:
+        return (
+            self._last_write is not None
+            and time.monotonic() - self._last_write < self.write_window.total_seconds()
+        )
+
+    def update(self, data, etas=None):
+        """Fold in a batch of device states and return the next interval.
+
+        ``etas`` maps device ids to the predicted seconds until their room
+        reaches the setpoint, where known.
+        """
+        changed = False
+        converging = []
+        for deviceId, state in data.items():
+            reading = _reading(state)
+            previous = self._readings.get(deviceId)
+            self._readings[deviceId] = reading
+            if previous != reading:
+                changed = True
+            if previous is not None and _converging(previous, reading):
+                converging.append(deviceId)
+
+        if self._recent_write():
+            self.interval = self.fast
+        elif converging:
+            known = [etas[deviceId] for deviceId in converging if (etas or {}).get(deviceId) is not None]
+            if len(known) == len(converging):
+                # poll shortly before the first predicted crossing
+                crossing = timedelta(seconds=min(known)) - self.fast
+                self.interval = min(max(crossing, self.fast), self.ceiling)
+            else:
+                self.interval = self.fast
+        elif changed:
+            self.interval = self.base
+        else:
+            self.interval = min(max(self.interval, self.base) * self.backoff, self.ceiling)
+        return self.interval
+
+
+class SalusCoordinator(DataUpdateCoordinator):
+    """Fetches ajax_device_values.php for every device of an account in one batch.
+
+    Entities subscribe instead of polling, so enabling more platforms never
+    adds cloud calls. ``data`` maps each device id to its latest ``DeviceState``; a
+    device whose read failed is left out so its entities go unavailable while
+    the others keep updating. The poll interval is chosen by ``AdaptiveInterval``.
+
+    Devices in ``stale`` show values restored from before a restart that no
+    read has confirmed yet.
+
+    ``changed(deviceId)`` tells each entity which fields changed in the last
+    update, so entities can skip writing a state that would be identical.
+    """
+
+    def __init__(self, hass, account, max_interval=DEFAULT_MAX_SCAN_INTERVAL):
+        self.adaptive = AdaptiveInterval(ceiling=max_interval)
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} {account._username}",
+            update_interval=self.adaptive.interval,
+        )
+        self.account = account
+        self.stale = set()
+        self.changes = {}
+        self.models = {}  # device id -> HeatingRateModel
+        self._unsub_write = account.async_add_write_listener(self._handle_write)
+
+    def configure(self, fast, base, ceiling) -> None:
+        """Apply new poll intervals to the running schedule."""
+        self.update_interval = self.adaptive.configure(fast, base, ceiling)
+        self._schedule_refresh()
+
+    async def async_shutdown(self) -> None:
+        await super().async_shutdown()
+        self._unsub_write()
+
+    def time_to_target(self, deviceId) -> float | None:
+        """Predicted seconds from now until the room of ``deviceId`` reaches its setpoint."""
+        model = self.models.get(deviceId)
+        salus = self.account.devices.get(deviceId)
+        state = (self.data or {}).get(deviceId)
+        if model is None or state is None or salus._data_wall is None:
+            return None
+        eta = model.time_to_target(state)
+        if eta is None:
+            return None
+        return max(eta - (time.time() - salus._data_wall), 0.0)
+
+    def changed(self, deviceId) -> frozenset:
+        """Fields of ``deviceId`` that changed in the last update pushed to listeners."""
+        return self.changes.get(deviceId, ALL_FIELDS)
+
+    def _track_changes(self, data) -> None:
+        previous = self.data or {}
+        self.changes = {
+            deviceId: _changed_fields(previous.get(deviceId), state)
+            for deviceId, state in data.items()
+        }
+
+    def restore_snapshot(self, data) -> None:
+        """Start from restored values until the first refresh replaces them."""
+        if data:
+            self.data = data
+            self.stale = set(data)
+
+    def _handle_write(self, deviceId) -> None:
+        """Push the write-patched values and pull the confirming read in."""
+        self.update_interval = self.adaptive.note_write()
+        values = self.account.device(deviceId)._data
+        if self.data is not None and values is not None:
+            data = {**self.data, deviceId: values}
+            self._track_changes(data)
+            # also reschedules the next refresh with the fast interval
+            self.async_set_updated_data(data)
+        else:
+            self._schedule_refresh()
+
+    async def _async_update_data(self):
+        results = await self.account.async_refresh()
+
+        data = {}
+        for deviceId, result in results.items():
+            if isinstance(result, Exception):
+                _LOGGER.error("Error updating device %s: %s", deviceId, result)
+            else:
+                data[deviceId] = result
+
+        stale = {deviceId for deviceId in data if self.account.devices[deviceId]._stale}
+        self._track_changes(data)
+        for deviceId in stale ^ (self.stale & set(data)):
+            self.changes[deviceId] |= {"stale"}
+        self.stale = stale  # served from cache (restored, or while the cloud is failing)
+
+        if results and not data:
+            raise UpdateFailed("Error getting data for every device of the account.")
+
+        etas = {}
+        for deviceId, state in data.items():
+            salus = self.account.devices[deviceId]
+            model = self.models.setdefault(deviceId, HeatingRateModel())
+            if deviceId not in stale:
+                model.observe(salus._data_wall, state)
+            etas[deviceId] = model.time_to_target(state)
+
+        self.update_interval = self.adaptive.update(data, etas)
+        _LOGGER.debug("Next poll of %s in %s", self.name, self.update_interval)
+        return data
@@ -0,0 +1,18 @@
+"""Diagnostics support for the Salus iT500 component."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD, "token"}
+
+
+async def async_get_config_entry_diagnostics(hass, entry) -> dict:
+    """Settings, health and hot-path metrics of the entry's account."""
+    # Every device of the entry shares one coordinator and account.
+    coordinator = entry.runtime_data
+    return async_redact_data(
+        {
+            "entry": {**entry.data, **entry.options},
+            "account": coordinator.account.diagnostics(),
+        },
+        TO_REDACT,
+    )
@@ -0,0 +1,31 @@
+"""Base of the entities showing one Salus device's coordinator values."""
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+
+class SalusEntity(CoordinatorEntity):
+    """An entity that writes its state only when what it shows has changed.
+
+    Subclasses set ``_deviceId`` and ``STATE_FIELDS`` (the DeviceState fields
+    they show) and implement ``get_data()``. A coordinator update skips the
+    state write (recorder row, state_changed event) unless one of those
+    fields, "stale" or the entity's availability changed.
+    """
+
+    STATE_FIELDS = frozenset()
+    _reported_available = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.get_data(self.coordinator.data)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self.get_data(self.coordinator.data)
+        changed = self.coordinator.changed(self._deviceId)
+        if self.available == self._reported_available and not (
+            changed & self.STATE_FIELDS or "stale" in changed
+        ):
+            return
+        self._reported_available = self.available
+        self.async_write_ha_state()
@@ -0,0 +1,84 @@
+"""Online model of how fast a room heats up, to predict when it reaches its set point."""
+import math
+
+# Temperatures are centred on this value (°C) to keep the fit well conditioned.
+REFERENCE_TEMPERATURE = 20.0
+
+
+class HeatingRateModel:
+    """Recursive least-squares fit of the heating rate of one room.
+
+    While the boiler fires, the room warms at roughly ``a + b * (T - 20)``
+    degrees per hour: ``a`` is what the heating delivers, ``b`` (negative) the
+    extra loss the warmer the room gets. Each pair of consecutive reads taken
+    while heating contributes one observed slope; older observations fade
+    with ``FORGETTING`` so the fit follows the weather and the season.
+    """
+
+    FORGETTING = 0.95
+    # Slopes needed before predictions are made.
+    MIN_SAMPLES = 3
+    # Reads further apart than this (seconds) say little about the slope.
+    MAX_GAP = 30 * 60
+
+    def __init__(self):
+        self.theta = [0.0, 0.0]
+        self._p = [[1000.0, 0.0], [0.0, 1000.0]]
+        self.samples = 0
+        self._last = None  # (timestamp, room temperature) of the last heating read
+
+    def observe(self, timestamp, state) -> None:
+        """Fold in a confirmed read (``DeviceState``) taken at ``timestamp`` (epoch seconds)."""
+        temperature = state.room_temperature
+        if not state.heating or temperature is None:
+            self._last = None
+            return
+
+        if self._last is not None:
+            last_time, last_temperature = self._last
+            gap = timestamp - last_time
+            if gap <= 0:
+                return  # the same read again
+            if gap <= self.MAX_GAP:
+                slope = (temperature - last_temperature) / gap * 3600
+                self._fit((last_temperature + temperature) / 2 - REFERENCE_TEMPERATURE, slope)
+        self._last = (timestamp, temperature)
+
+    def _fit(self, x, y) -> None:
+        """One RLS step for the features (1, x) and the observed slope ``y``."""
+        p, lam = self._p, self.FORGETTING
+        px = [p[0][0] + p[0][1] * x, p[1][0] + p[1][1] * x]
+        gain_denominator = lam + px[0] + x * px[1]
+        k = [px[0] / gain_denominator, px[1] / gain_denominator]
+        error = y - (self.theta[0] + self.theta[1] * x)
+        self.theta = [self.theta[0] + k[0] * error, self.theta[1] + k[1] * error]
+        # P = (P - k * x^T * P) / lambda, with x^T * P == px^T since P is symmetric
+        self._p = [[(p[i][j] - k[i] * px[j]) / lam for j in range(2)] for i in range(2)]
+        self.samples += 1
+
+    def rate(self, temperature) -> float:
+        """Predicted warming while heating at ``temperature``, in °C per hour."""
+        return self.theta[0] + self.theta[1] * (temperature - REFERENCE_TEMPERATURE)
+
+    def time_to_target(self, state) -> float | None:
+        """Seconds until a heating room reaches its set point, from the moment of ``state``.
+
+        None while there is too little data, when the boiler is not firing, or
+        when the fit says the set point will not be reached.
+        """
+        room, target = state.room_temperature, state.target_temperature
+        if self.samples < self.MIN_SAMPLES or not state.heating or None in (room, target):
+            return None
+        if room >= target:
+            return 0.0
+
+        start, end = self.rate(room), self.rate(target)
+        if start <= 0 or end <= 0:
+            return None
+        b = self.theta[1]
+        if abs(b) < 1e-6:
+            hours = (target - room) / start
+        else:
+            # integral of dT / (a + b * T) from room to target
+            hours = math.log(end / start) / b
+        return hours * 3600
@@ -0,0 +1,137 @@
+"""Bounded, array-backed history of the readings of one device."""
+import math
+import struct
+from array import array
+
+# File layout: magic, version, number of readings, then each column's raw
+# array bytes in chronological order (native byte order, like ``array``).
+FILE_MAGIC = b"SLH"
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct("=3sBI")
+
+NAN = float("nan")
+
+
+def _float(value):
+    return NAN if value is None else value
+
+
+def _mean(values):
+    known = [v for v in values if not math.isnan(v)]
+    return round(sum(known) / len(known), 2) if known else None
+
+
+class History:
+    """Ring buffer of timestamped readings, one typed ``array`` per column.
+
+    Each reading takes 17 bytes (a double timestamp, two single precision
+    temperatures and a signed byte for heating) instead of a dict per row, so
+    a few days of reads cost a couple hundred kilobytes per device. Once
+    ``size`` readings are kept the oldest is overwritten. Missing values are
+    stored as NaN (temperatures) or -1 (heating).
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.times = array("d", bytes(8 * size))
+        self.room = array("f", bytes(4 * size))
+        self.target = array("f", bytes(4 * size))
+        self.heating = array("b", bytes(size))
+        self._start = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _next_slot(self) -> int:
+        """Claim the position after the newest reading, dropping the oldest when full."""
+        i = (self._start + self._count) % self.size
+        if self._count == self.size:
+            self._start = (self._start + 1) % self.size
+        else:
+            self._count += 1
+        return i
+
+    def append(self, timestamp, state) -> None:
+        """Record ``state`` (a ``DeviceState``) as read at ``timestamp`` (epoch seconds)."""
+        i = self._next_slot()
+        self.times[i] = timestamp
+        self.room[i] = _float(state.room_temperature)
+        self.target[i] = _float(state.target_temperature)
+        self.heating[i] = -1 if state.heating is None else int(state.heating)
+
+    def _indexes(self):
+        """Buffer positions from oldest to newest."""
+        return ((self._start + n) % self.size for n in range(self._count))
+
+    def query(self, since, resolution) -> list:
+        """Readings at or after ``since``, averaged into ``resolution`` second buckets.
+
+        Each bucket reports its start time, the mean temperatures and the
+        share of its readings during which the boiler was heating.
+        """
+        buckets = []
+        current = None
+        for i in self._indexes():
+            t = self.times[i]
+            if t < since:
+                continue
+            start = since + (t - since) // resolution * resolution
+            if current is None or current["start"] != start:
+                current = {"start": start, "room": [], "target": [], "heating": []}
+                buckets.append(current)
+            current["room"].append(self.room[i])
+            current["target"].append(self.target[i])
+            if self.heating[i] >= 0:
+                current["heating"].append(self.heating[i])
+
+        return [
+            {
+                "time": bucket["start"],
+                "room_temperature": _mean(bucket["room"]),
+                "target_temperature": _mean(bucket["target"]),
+                "heating": (
+                    round(sum(bucket["heating"]) / len(bucket["heating"]), 2) if bucket["heating"] else None
+                ),
+                "readings": len(bucket["room"]),
+            }
+            for bucket in buckets
+        ]
+
+    def to_bytes(self) -> bytes:
+        """The readings in the compact file format, oldest first."""
+        order = list(self._indexes())
+        columns = (
+            array(column.typecode, (column[i] for i in order))
+            for column in (self.times, self.room, self.target, self.heating)
+        )
+        return FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, len(order)) + b"".join(
+            column.tobytes() for column in columns
+        )
+
+    def load_bytes(self, data) -> None:
+        """Append the readings of a ``to_bytes`` dump; raises ``ValueError`` if it is malformed."""
+        if len(data) < FILE_HEADER.size:
+            raise ValueError("Truncated Salus history file")
+        magic, version, count = FILE_HEADER.unpack_from(data)
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            raise ValueError("Not a Salus history file")
+
+        columns = []
+        offset = FILE_HEADER.size
+        for typecode in ("d", "f", "f", "b"):
+            column = array(typecode)
+            end = offset + count * column.itemsize
+            if end > len(data):
+                raise ValueError("Truncated Salus history file")
+            column.frombytes(data[offset:end])
+            columns.append(column)
+            offset = end
+
+        times, room, target, heating = columns
+        for n in range(max(0, count - self.size), count):
+            i = self._next_slot()
+            self.times[i] = times[n]
+            self.room[i] = room[n]
+            self.target[i] = target[n]
+            self.heating[i] = heating[n]
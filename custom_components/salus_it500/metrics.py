@@ -0,0 +1,108 @@
+"""Counters and latency histograms recorded by the Salus client."""
+import bisect
+import time
+from contextlib import contextmanager
+
+# Upper bounds of the latency buckets, in seconds; the last bucket is open ended.
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+ENDPOINTS = ("login", "control", "values", "set")
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; cheap enough to update on every request."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, q) -> float | None:
+        """Upper bound of the bucket holding the ``q``-th percentile (the max past the last bound)."""
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "buckets": {
+                **{f"le_{bound}": n for bound, n in zip(BUCKETS, self.counts)},
+                "inf": self.counts[-1],
+            },
+        }
+
+
+class ClientMetrics:
+    """What one account's client did: per-endpoint latency and errors, retries,
+    data cache hits and misses, token refreshes and time spent waiting on locks
+    and for a request slot.
+    """
+
+    def __init__(self):
+        self.latency = {endpoint: Histogram() for endpoint in ENDPOINTS}
+        self.errors = dict.fromkeys(ENDPOINTS, 0)
+        self.retries = dict.fromkeys(ENDPOINTS, 0)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_joins = 0  # misses that attached to a fetch already in flight
+        self.logins = 0
+        self.token_refreshes = 0
+        self.lock_wait = Histogram()
+        self.slot_wait = Histogram()  # queued behind the shared FetchScheduler
+
+    @contextmanager
+    def timed(self, endpoint):
+        """Time one request to ``endpoint``; a raised exception counts as an error."""
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException:
+            self.errors[endpoint] += 1
+            raise
+        finally:
+            self.latency[endpoint].observe(time.monotonic() - start)
+
+    @property
+    def cache_hit_ratio(self) -> float | None:
+        reads = self.cache_hits + self.cache_misses
+        return self.cache_hits / reads if reads else None
+
+    def as_dict(self) -> dict:
+        return {
+            "latency": {endpoint: h.as_dict() for endpoint, h in self.latency.items()},
+            "errors": dict(self.errors),
+            "retries": dict(self.retries),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_joins": self.cache_joins,
+            "cache_hit_ratio": self.cache_hit_ratio,
+            "logins": self.logins,
+            "token_refreshes": self.token_refreshes,
+            "lock_wait": self.lock_wait.as_dict(),
+            "slot_wait": self.slot_wait.as_dict(),
+        }
@@ -0,0 +1,108 @@
+"""Typed device state parsed from ajax_device_values.php."""
+import json
+import re
+from dataclasses import dataclass
+
+try:
+    # Ships with Home Assistant; parses bytes straight into Python objects.
+    import orjson
+except ImportError:
+    orjson = None
+
+# A values body is a JSON object; a logged-out session gets an HTML page.
+VALUES_BODY_RE = re.compile(rb"\s*\{")
+
+
+class DeviceStateError(ValueError):
+    """The device values could not be parsed."""
+
+
+def _float(values, key):
+    value = values.get(key)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError) as e:
+        raise DeviceStateError(f"{key} is not a number: {value!r}") from e
+
+
+def _flag(values, key):
+    value = values.get(key)
+    return None if value is None else str(value) == "1"
+
+
+def _loads(body):
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def is_values_body(body) -> bool:
+    """Whether the raw ``body`` can be device values, judged by its first non-blank byte.
+
+    Cheap enough to run on every read: it tells the logged-out HTML page
+    apart without decoding or parsing anything.
+    """
+    return VALUES_BODY_RE.match(body) is not None
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceState:
+    """One read of a device, parsed once and shared by every entity.
+
+    A field is ``None`` when the cloud did not send its key; a key that is
+    present but malformed raises ``DeviceStateError`` from ``from_values``.
+    Only ``from_values`` keeps the keys without a typed field, as sent, in
+    ``extra``; live reads through ``from_body`` leave it empty.
+    """
+
+    room_temperature: float | None = None    # CH1currentRoomTemp
+    target_temperature: float | None = None  # CH1currentSetPoint
+    frost_temperature: float | None = None   # frost
+    heating: bool | None = None              # CH1heatOnOffStatus: the boiler is firing
+    heating_off: bool | None = None          # CH1heatOnOff: the zone is switched off
+    hot_water: bool | None = None            # HWonOffStatus
+    extra: tuple = ()                        # (key, value) pairs of all other keys, if kept
+
+    FIELDS = {
+        "CH1currentRoomTemp": ("room_temperature", _float),
+        "CH1currentSetPoint": ("target_temperature", _float),
+        "frost": ("frost_temperature", _float),
+        "CH1heatOnOffStatus": ("heating", _flag),
+        "CH1heatOnOff": ("heating_off", _flag),
+        "HWonOffStatus": ("hot_water", _flag),
+    }
+
+    @classmethod
+    def from_values(cls, values, keep_extra=True) -> "DeviceState":
+        """Build the state from decoded values; ``keep_extra=False`` drops untyped keys."""
+        if not isinstance(values, dict):
+            raise DeviceStateError(f"Expected an object, got {type(values).__name__}")
+        extra = tuple(sorted((k, v) for k, v in values.items() if k not in cls.FIELDS)) if keep_extra else ()
+        return cls(
+            **{name: parse(values, key) for key, (name, parse) in cls.FIELDS.items()},
+            extra=extra,
+        )
+
+    @classmethod
+    def from_body(cls, body) -> "DeviceState":
+        """Parse a raw (bytes) values body, keeping only the typed fields.
+
+        The cloud sends many more keys than the entities read; leaving them
+        out of ``extra`` keeps the cached state small and cheap to compare.
+        """
+        try:
+            values = _loads(body)
+        except ValueError as e:  # orjson's decode error is a ValueError too
+            raise DeviceStateError("The values body is not JSON") from e
+        return cls.from_values(values, keep_extra=False)
+
+    def as_values(self) -> dict:
+        """The state in the cloud's own string format, e.g. for storage."""
+        values = dict(self.extra)
+        for key, (name, _) in self.FIELDS.items():
+            value = getattr(self, name)
+            if isinstance(value, bool):
+                values[key] = "1" if value else "0"
+            elif value is not None:
+                values[key] = str(value)
+        return values
@@ -0,0 +1,78 @@
+"""Request slots shared by every Salus account, handed out in turns."""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class FetchScheduler:
+    """Bounds the requests in flight to salus-it500.com across accounts.
+
+    At most ``limit`` requests run at once, whichever account makes them.
+    When all slots are taken, waiting accounts are served round robin, one
+    request per turn, so an account with many devices (or one stuck retrying)
+    cannot starve the others. Total refresh time thus grows with the number
+    of requests over ``limit``, not with the number of accounts.
+
+    ``start_delay()`` spaces out the first refresh of accounts that need to
+    log in, so a restart does not send every login at the same moment.
+    """
+
+    def __init__(self, limit, stagger=0.0):
+        self.limit = limit
+        self.stagger = stagger
+        self.running = 0
+        self._waiters = {}     # account key -> deque of futures waiting for a slot
+        self._turns = deque()  # account keys with waiters, in serving order
+        self._next_start = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    @asynccontextmanager
+    async def slot(self, key):
+        """Hold one request slot for ``key`` (the account) while the block runs."""
+        if self.running < self.limit and not self._turns:
+            self.running += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            waiters = self._waiters.setdefault(key, deque())
+            if not waiters:
+                self._turns.append(key)
+            waiters.append(waiter)
+            try:
+                await waiter  # the releasing request hands its slot over
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release()  # handed a slot after all; pass it on
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        """Give the slot to the next account in turn, or free it."""
+        while self._turns:
+            key = self._turns.popleft()
+            waiters = self._waiters[key]
+            waiter = waiters.popleft()
+            if waiters:
+                self._turns.append(key)  # back of the line for its next request
+            else:
+                del self._waiters[key]
+            if not waiter.done():  # skip callers cancelled while waiting
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+    def start_delay(self) -> float:
+        """Seconds to hold back a first refresh; each call books the next ``stagger`` slot."""
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + self.stagger
+        return start - now
+
+    def diagnostics(self) -> dict:
+        return {"limit": self.limit, "running": self.running, "waiting": self.waiting}
@@ -0,0 +1,68 @@
+"""Validation of an account's settings, shared by YAML and config entries."""
+from datetime import timedelta
+
+import voluptuous as vol
+
+import homeassistant.helpers.config_validation as cv
+from homeassistant.const import (
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    CONF_ID,
+)
+
+from .const import (
+    PLATFORMS,
+    DEFAULT_PLATFORMS,
+    CONF_FAST_SCAN_INTERVAL,
+    CONF_SCAN_INTERVAL,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_DATA_TTL,
+    CONF_TOKEN_TTL,
+    CONF_HISTORY_FILE,
+    FAST_UPDATE_INTERVAL,
+    UPDATE_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DATA_TTL,
+    TOKEN_TTL,
+    CONF_CONNECT_TIMEOUT,
+    CONF_READ_TIMEOUT,
+    CONF_DEADLINE,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_DEADLINE,
+)
+
+
+def _check_intervals(config):
+    """Keep the data cache shorter than the fastest poll and the poll intervals in order."""
+    if config[CONF_DATA_TTL] >= config[CONF_FAST_SCAN_INTERVAL]:
+        raise vol.Invalid(
+            f"{CONF_DATA_TTL} must be shorter than {CONF_FAST_SCAN_INTERVAL}, or polls are served from the cache"
+        )
+    if not config[CONF_FAST_SCAN_INTERVAL] <= config[CONF_SCAN_INTERVAL] <= config[CONF_MAX_SCAN_INTERVAL]:
+        raise vol.Invalid(
+            f"expected {CONF_FAST_SCAN_INTERVAL} <= {CONF_SCAN_INTERVAL} <= {CONF_MAX_SCAN_INTERVAL}"
+        )
+    return config
+
+
+ACCOUNT_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(CONF_USERNAME): cv.string,
+            vol.Required(CONF_PASSWORD): cv.string,
+            vol.Required(CONF_ID): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(PLATFORMS, default=DEFAULT_PLATFORMS): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(CONF_FAST_SCAN_INTERVAL, default=FAST_UPDATE_INTERVAL): cv.time_period,
+            vol.Optional(CONF_SCAN_INTERVAL, default=UPDATE_INTERVAL): cv.time_period,
+            vol.Optional(CONF_MAX_SCAN_INTERVAL, default=DEFAULT_MAX_SCAN_INTERVAL): cv.time_period,
+            vol.Optional(CONF_DATA_TTL, default=timedelta(seconds=DATA_TTL)): cv.time_period,
+            vol.Optional(CONF_TOKEN_TTL, default=timedelta(seconds=TOKEN_TTL)): cv.time_period,
+            vol.Optional(CONF_CONNECT_TIMEOUT, default=DEFAULT_CONNECT_TIMEOUT): vol.All(vol.Coerce(float), vol.Range(min=1)),
+            vol.Optional(CONF_READ_TIMEOUT, default=DEFAULT_READ_TIMEOUT): vol.All(vol.Coerce(float), vol.Range(min=1)),
+            vol.Optional(CONF_DEADLINE, default=DEFAULT_DEADLINE): vol.All(vol.Coerce(float), vol.Range(min=1)),
+            vol.Optional(CONF_HISTORY_FILE, default=False): cv.boolean,
+        }
+    ),
+    _check_intervals,
+)
@@ -0,0 +1,258 @@
+"""
+Adds temperature sensors for the Salus thermostat units.
+
+The sensors read the values the coordinator already fetched for the climate
+and water heater entities, so they cost no extra requests. The predicted time
+to the set point, when each device was last read and the poll interval are
+sensors too, so they refresh without making the thermostat write its state on
+every read; the latter two and the client's own metrics are diagnostic
+sensors, disabled by default.
+"""
+import logging
+
+from homeassistant.const import (
+    CONF_ID,
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfTemperature,
+    UnitOfTime,
+)
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.core import callback
+import homeassistant.util.dt as dt_util
+from .const import DOMAIN
+from .entity import SalusEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+# (DeviceState field, name suffix, state class)
+SENSORS = (
+    ("room_temperature", "room temperature", SensorStateClass.MEASUREMENT),
+    ("target_temperature", "target temperature", None),
+    ("frost_temperature", "frost temperature", None),
+)
+
+def _minutes_to_target(coordinator, deviceId):
+    seconds = coordinator.time_to_target(deviceId)
+    return round(seconds / 60, 1) if seconds is not None else None
+
+
+def _last_read(coordinator, deviceId):
+    wall = coordinator.account.devices[deviceId]._data_wall
+    return dt_util.utc_from_timestamp(wall) if wall else None
+
+
+# (key, name suffix, unit, device class, diagnostic, value from the coordinator and device id)
+STATUS_SENSORS = (
+    # minutes until the room reaches the set point while heating, if predictable
+    ("time_to_target", "time to target", UnitOfTime.MINUTES, SensorDeviceClass.DURATION, False, _minutes_to_target),
+    ("last_read", "last read", None, SensorDeviceClass.TIMESTAMP, True, _last_read),
+    (
+        "update_interval",
+        "update interval",
+        UnitOfTime.SECONDS,
+        SensorDeviceClass.DURATION,
+        True,
+        lambda coordinator, deviceId: coordinator.update_interval.total_seconds(),
+    ),
+)
+
+def _ms(histogram):
+    return round(histogram.mean * 1000, 1) if histogram.count else None
+
+# (key, name suffix, unit, value from the account's ClientMetrics)
+METRIC_SENSORS = (
+    ("values_latency", "values latency", UnitOfTime.MILLISECONDS, lambda m: _ms(m.latency["values"])),
+    ("set_latency", "set latency", UnitOfTime.MILLISECONDS, lambda m: _ms(m.latency["set"])),
+    ("lock_wait", "lock wait", UnitOfTime.MILLISECONDS, lambda m: _ms(m.lock_wait)),
+    (
+        "cache_hit_ratio",
+        "cache hit ratio",
+        PERCENTAGE,
+        lambda m: round(m.cache_hit_ratio * 100, 1) if m.cache_hit_ratio is not None else None,
+    ),
+    ("retries", "retries", None, lambda m: sum(m.retries.values())),
+    ("token_refreshes", "token refreshes", None, lambda m: m.token_refreshes),
+)
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    await async_setup_platform(hass, None, async_add_entities, {CONF_ID: entry.data[CONF_ID]})
+
+
+async def async_setup_platform(hass, hass_config, async_add_entities, discovery_info=None):
+    name = "Salus thermostat"
+
+    if discovery_info != None:
+        deviceIds = discovery_info[CONF_ID]
+
+        async_add_entities(
+            [
+                SalusSensor(
+                    name if len(deviceIds) == 1 else f"{name} {deviceId}",
+                    hass.data[DOMAIN][deviceId],
+                    deviceId,
+                    field,
+                    label,
+                    state_class,
+                )
+                for deviceId in deviceIds
+                for field, label, state_class in SENSORS
+            ]
+        )
+        async_add_entities(
+            [
+                SalusStatusSensor(
+                    name if len(deviceIds) == 1 else f"{name} {deviceId}",
+                    hass.data[DOMAIN][deviceId],
+                    deviceId,
+                    key,
+                    label,
+                    unit,
+                    device_class,
+                    diagnostic,
+                    value,
+                )
+                for deviceId in deviceIds
+                for key, label, unit, device_class, diagnostic, value in STATUS_SENSORS
+            ]
+        )
+
+        # The metrics belong to the account all devices share; show them once.
+        deviceId = deviceIds[0]
+        async_add_entities(
+            [
+                SalusMetricSensor(hass.data[DOMAIN][deviceId], deviceId, key, label, unit, value)
+                for key, label, unit, value in METRIC_SENSORS
+            ]
+        )
+
+
+class SalusSensor(SalusEntity, SensorEntity):
+    """One temperature reported by a Salus thermostat."""
+
+    _attr_device_class = SensorDeviceClass.TEMPERATURE
+    _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
+
+    def __init__(self, name, coordinator, deviceId, field, label, state_class):
+        super().__init__(coordinator)
+        self._deviceId = deviceId
+        self._field = field
+        self.STATE_FIELDS = frozenset({field})
+        self._attr_unique_id = f"salus_it500_{deviceId}_{field}"
+        self._attr_name = f"{name} {label}"
+        self._attr_state_class = state_class
+        self._attr_available = False
+        self._attr_native_value = None
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        # Group the sensors under the thermostat's device.
+        return DeviceInfo(
+            identifiers={(DOMAIN, f"salus_it500_{self._deviceId}_thermostat")},
+            manufacturer="Salus",
+            model="IT500",
+        )
+
+    @property
+    def should_poll(self):
+        return False
+
+    @property
+    def available(self):
+        return super().available and self._attr_available
+
+    @property
+    def extra_state_attributes(self):
+        return {"stale": self._deviceId in self.coordinator.stale}
+
+    def get_data(self, data):
+        state = data.get(self._deviceId) if data else None
+        value = getattr(state, self._field) if state is not None else None
+        self._attr_native_value = value
+        self._attr_available = value is not None
+
+
+class SalusStatusSensor(CoordinatorEntity, SensorEntity):
+    """How a thermostat is being read: changes on its own schedule, not with the values."""
+
+    def __init__(self, name, coordinator, deviceId, key, label, unit, device_class, diagnostic, value):
+        super().__init__(coordinator)
+        self._deviceId = deviceId
+        self._value = value
+        self._reported = None
+        self._attr_unique_id = f"salus_it500_{deviceId}_{key}"
+        self._attr_name = f"{name} {label}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        if diagnostic:
+            self._attr_entity_category = EntityCategory.DIAGNOSTIC
+            self._attr_entity_registry_enabled_default = False
+        self._attr_native_value = None
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return DeviceInfo(
+            identifiers={(DOMAIN, f"salus_it500_{self._deviceId}_thermostat")},
+            manufacturer="Salus",
+            model="IT500",
+        )
+
+    @property
+    def should_poll(self):
+        return False
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._attr_native_value = self._value(self.coordinator, self._deviceId)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._attr_native_value = self._value(self.coordinator, self._deviceId)
+        # write only when this sensor's own value (or availability) moved
+        if (self.available, self._attr_native_value) == self._reported:
+            return
+        self._reported = (self.available, self._attr_native_value)
+        self.async_write_ha_state()
+
+
+class SalusMetricSensor(CoordinatorEntity, SensorEntity):
+    """One of the Salus client's metrics, refreshed with every coordinator update."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator, deviceId, key, label, unit, value):
+        super().__init__(coordinator)
+        self._deviceId = deviceId
+        self._value = value
+        self._attr_unique_id = f"salus_it500_{deviceId}_metric_{key}"
+        self._attr_name = f"Salus client {label}"
+        self._attr_native_unit_of_measurement = unit
+        # unitless metrics are counters that only grow
+        self._attr_state_class = SensorStateClass.MEASUREMENT if unit else SensorStateClass.TOTAL_INCREASING
+        if unit == UnitOfTime.MILLISECONDS:
+            self._attr_device_class = SensorDeviceClass.DURATION
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return DeviceInfo(
+            identifiers={(DOMAIN, f"salus_it500_{self._deviceId}_thermostat")},
+            manufacturer="Salus",
+            model="IT500",
+        )
+
+    @property
+    def should_poll(self):
+        return False
+
+    @property
+    def native_value(self):
+        return self._value(self.coordinator.account.metrics)
@@ -2,7 +2,6 @@
 Adds support for the Salus water heater units.
 """
 import logging
-from datetime import timedelta
 
 from homeassistant.const import (
     CONF_ID,
@@ -18,33 +17,47 @@ from homeassistant.components.water_heater import (
     WaterHeaterEntityFeature,
 )
 
-from homeassistant.helpers.reload import async_setup_reload_service
 from homeassistant.util.unit_conversion import TemperatureConverter
 from homeassistant.helpers.device_registry import DeviceInfo
-from . import DOMAIN
+from .const import DOMAIN
+from .entity import SalusEntity
 
 _LOGGER = logging.getLogger(__name__)
 
 SUPPORT_FLAGS = WaterHeaterEntityFeature.OPERATION_MODE
-SCAN_INTERVAL = timedelta(minutes=2)
+
+async def async_setup_entry(hass, entry, async_add_entities):
+    await async_setup_platform(hass, None, async_add_entities, {CONF_ID: entry.data[CONF_ID]})
+
 
 async def async_setup_platform(hass, hass_config, async_add_entities, discovery_info=None):
     name = "Salus water heater"
 
     if discovery_info != None:
-        deviceId = discovery_info[CONF_ID]
-        salus = hass.data[DOMAIN][deviceId]
+        deviceIds = discovery_info[CONF_ID]
 
         async_add_entities(
-            [SalusWaterHeater(hass, name, salus, deviceId)]
+            [
+                SalusWaterHeater(
+                    hass,
+                    name if len(deviceIds) == 1 else f"{name} {deviceId}",
+                    hass.data[DOMAIN][deviceId],
+                    deviceId,
+                )
+                for deviceId in deviceIds
+            ]
         )
 
 
-class SalusWaterHeater(WaterHeaterEntity):
+class SalusWaterHeater(SalusEntity, WaterHeaterEntity):
     """Representation of a Salus water heater device."""
 
-    def __init__(self, hass, name, salus, deviceId):
-        self._salus = salus
+    STATE_FIELDS = frozenset({"hot_water"})
+
+    def __init__(self, hass, name, coordinator, deviceId):
+        super().__init__(coordinator)
+        self._salus = coordinator.account.device(deviceId)
+        self._deviceId = deviceId
         self._attr_unique_id=f"salus_it500_{deviceId}_water_heater"
         self._attr_available = False
         self._hass = hass
@@ -81,7 +94,15 @@ class SalusWaterHeater(WaterHeaterEntity):
 
     @property
     def should_poll(self):
-        return True
+        return False
+
+    @property
+    def available(self):
+        return super().available and self._attr_available
+
+    @property
+    def extra_state_attributes(self):
+        return {"stale": self._deviceId in self.coordinator.stale}
 
     @property
     def current_operation(self):
@@ -91,27 +112,27 @@ class SalusWaterHeater(WaterHeaterEntity):
     def operation_list(self):
         return self._operation_list
 
-    def turn_on(self):
+    async def async_turn_on(self):
         try:
-            if self._salus._set_data({"hwmode_once": "1"}):
+            if await self._salus._set_data({"hwmode_once": "1"}):
                 self._current_operation = STATE_ON
         except Exception as e:
-            _LOGGER.error("Error setting mode ON.", e)
+            _LOGGER.error("Error setting mode ON: %s", e)
 
-    def turn_off(self):
+    async def async_turn_off(self):
         try:
-            if self._salus._set_data({"hwmode_off": "1"}):
+            if await self._salus._set_data({"hwmode_off": "1"}):
                 self._current_operation = STATE_OFF
         except Exception as e:
-            _LOGGER.error("Error setting mode OFF.", e)
+            _LOGGER.error("Error setting mode OFF: %s", e)
 
-    def set_operation_mode(self, operation_mode: str) -> None:
+    async def async_set_operation_mode(self, operation_mode: str) -> None:
         if operation_mode == STATE_ON:
-            self.turn_on()
+            await self.async_turn_on()
         elif (
             operation_mode == STATE_OFF
         ):        
-            self.turn_off()
+            await self.async_turn_off()
 
     @property
     def current_temperature(self):
@@ -145,19 +166,11 @@ class SalusWaterHeater(WaterHeaterEntity):
             
         return self._max_temp
             
-    async def get_data(self):
-        try: 
-            data = await self._hass.async_add_executor_job(self._salus._get_data)
-
-            if data['HWonOffStatus'] == "1":
-                self._current_operation = STATE_ON
-            else:
-                self._current_operation = STATE_OFF
-
-            self._attr_available = True
-        except Exception as e:
-            _LOGGER.error(e)   
-
-    async def async_update(self) -> None:
-        await self.get_data()
-
+    def get_data(self, data):
+        state = data.get(self._deviceId) if data else None
+        if state is None or state.hot_water is None:
+            self._attr_available = False
+            return
+
+        self._current_operation = STATE_ON if state.hot_water else STATE_OFF
+        self._attr_available = True
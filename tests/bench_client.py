@@ -0,0 +1,231 @@
+"""Offline benchmark for the Salus client.
+
+Drives ``Salus._get_data`` and ``Salus._set_data`` from many concurrent
+callers against ``FakeSession`` with injected latency and failures, and
+reports per-call latency (p50/p99), HTTP calls per logical read or write and
+how long the event loop was blocked. Nothing leaves the machine.
+
+Run it from the repository root:
+
+    python tests/bench_client.py [--callers 50] [--rounds 20] [--output bench_output.txt]
+
+It is not collected by pytest; compare its numbers before and after a change
+to the caching, locking or retry code.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import conftest  # noqa: E402,F401  installs the homeassistant stubs
+from fakes import FakeResponse, FakeSession, count  # noqa: E402
+
+import salus_it500  # noqa: E402
+
+VALUES = "ajax_device_values.php"
+SET = "set.php"
+
+
+class FlakyResponse(FakeResponse):
+    """A response that takes ``latency`` seconds to arrive and may fail instead."""
+
+    def __init__(self, text, latency, fail, chunk_size=None):
+        super().__init__(text, chunk_size=chunk_size)
+        self._latency = latency
+        self._fail = fail
+
+    async def __aenter__(self):
+        await asyncio.sleep(self._latency)
+        if self._fail:
+            raise aiohttp.ClientConnectionError("injected failure")
+        return self
+
+
+class FlakySession(FakeSession):
+    """``FakeSession`` with per-request latency (uniform in ``latency``) and an error rate."""
+
+    def __init__(self, latency=(0.02, 0.08), error_rate=0.0, seed=0):
+        super().__init__()
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    def _respond(self, response):
+        return FlakyResponse(
+            response._text,
+            self._random.uniform(*self.latency),
+            self._random.random() < self.error_rate,
+            self.chunk_size,
+        )
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        return self._respond(super().post(url, data, headers, timeout))
+
+    def get(self, url, params=None, timeout=None):
+        return self._respond(super().get(url, params, timeout))
+
+
+class LoopMonitor:
+    """Measures how late a periodic tick fires, i.e. how long the loop was blocked."""
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def __enter__(self):
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+def make_client(session, breaker_threshold=5):
+    account = salus_it500.SalusAccount("bench@example.com", "secret", session=session)
+    account.retry = salus_it500.RetryPolicy(base_delay=0.005, max_delay=0.05)
+    account.breaker.threshold = breaker_threshold
+    return account.device("BENCH")
+
+
+async def timed(latencies, failures, call):
+    start = time.perf_counter()
+    try:
+        await call()
+    except Exception:
+        failures.append(1)
+    latencies.append(time.perf_counter() - start)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1] if len(values) > 1 else values[0]
+
+
+async def read_scenario(name, callers, rounds, expire, **session_args):
+    """``callers`` concurrent reads per round; ``expire`` drops the cache before each round."""
+    session = FlakySession(**session_args)
+    client = make_client(session, breaker_threshold=1000)
+    latencies, failures = [], []
+
+    cpu = time.thread_time()
+    with LoopMonitor() as monitor:
+        for _ in range(rounds):
+            if expire:
+                client._data_time = float("-inf")
+            await asyncio.gather(
+                *(timed(latencies, failures, client._get_data) for _ in range(callers))
+            )
+    cpu = time.thread_time() - cpu
+
+    reads = callers * rounds
+    return {
+        "scenario": name,
+        "operations": reads,
+        "failures": len(failures),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "http_per_op": len(session.calls) / reads,
+        "values_per_op": count(session, VALUES) / reads,
+        "cpu_ms": cpu * 1000,
+        "max_block_ms": max(monitor.lags, default=0.0) * 1000,
+    }
+
+
+async def write_scenario(name, callers, rounds, **session_args):
+    """``callers`` concurrent writes per round, each to its own key so they all merge."""
+    session = FlakySession(**session_args)
+    client = make_client(session, breaker_threshold=1000)
+    client.WRITE_DEBOUNCE = 0.01
+    latencies, failures = [], []
+
+    cpu = time.thread_time()
+    with LoopMonitor() as monitor:
+        for _ in range(rounds):
+            await asyncio.gather(
+                *(
+                    timed(latencies, failures, lambda i=i: client._set_data({f"key{i}": "1"}))
+                    for i in range(callers)
+                )
+            )
+    cpu = time.thread_time() - cpu
+
+    writes = callers * rounds
+    return {
+        "scenario": name,
+        "operations": writes,
+        "failures": len(failures),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "http_per_op": len(session.calls) / writes,
+        "values_per_op": count(session, SET, "POST") / writes,
+        "cpu_ms": cpu * 1000,
+        "max_block_ms": max(monitor.lags, default=0.0) * 1000,
+    }
+
+
+async def run(callers, rounds):
+    return [
+        await read_scenario("read, warm cache", callers, rounds, expire=False),
+        await read_scenario("read, cold cache", callers, rounds, expire=True),
+        await read_scenario("read, cold, 20% errors", callers, rounds, expire=True, error_rate=0.2),
+        await write_scenario("write, merged", callers, rounds),
+        await write_scenario("write, 20% errors", callers, rounds, error_rate=0.2),
+    ]
+
+
+def format_report(results):
+    columns = (
+        ("scenario", "{:<24}"),
+        ("operations", "{:>10}"),
+        ("failures", "{:>8}"),
+        ("p50_ms", "{:>8.2f}"),
+        ("p99_ms", "{:>8.2f}"),
+        ("http_per_op", "{:>11.3f}"),
+        ("values_per_op", "{:>13.3f}"),
+        ("cpu_ms", "{:>8.1f}"),
+        ("max_block_ms", "{:>12.2f}"),
+    )
+    header = " ".join(
+        f"{{:<{len(fmt.format(results[0][key]))}}}".format(key) if key == "scenario"
+        else f"{{:>{len(fmt.format(results[0][key]))}}}".format(key)
+        for key, fmt in columns
+    )
+    lines = [header]
+    for result in results:
+        lines.append(" ".join(fmt.format(result[key]) for key, fmt in columns))
+    lines.append("")
+    lines.append("http_per_op counts every request; values_per_op counts only value reads")
+    lines.append("(set.php posts for write scenarios). cpu_ms is time the loop thread spent")
+    lines.append("running; max_block_ms is the longest the loop was unable to run other tasks.")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--callers", type=int, default=50, help="concurrent callers per round")
+    parser.add_argument("--rounds", type=int, default=20, help="rounds per scenario")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = format_report(asyncio.run(run(args.callers, args.rounds)))
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ data cache and the retry logic — without pulling in all of HA.
 """
 import sys
 import types
+from datetime import timedelta
 from pathlib import Path
 
 import pytest
@@ -26,11 +27,97 @@ climate = _stub("homeassistant.components.climate")
 climate.DOMAIN = "climate"
 water_heater = _stub("homeassistant.components.water_heater")
 water_heater.DOMAIN = "water_heater"
+sensor = _stub("homeassistant.components.sensor")
+sensor.DOMAIN = "sensor"
+binary_sensor = _stub("homeassistant.components.binary_sensor")
+binary_sensor.DOMAIN = "binary_sensor"
 helpers = _stub("homeassistant.helpers")
+core = _stub("homeassistant.core")
+core.SupportsResponse = types.SimpleNamespace(NONE="none", OPTIONAL="optional", ONLY="only")
+core.callback = lambda func: func
+exceptions = _stub("homeassistant.exceptions")
+
+
+class HomeAssistantError(Exception):
+    pass
+
+
+exceptions.HomeAssistantError = HomeAssistantError
 discovery = _stub("homeassistant.helpers.discovery")
+aiohttp_client = _stub("homeassistant.helpers.aiohttp_client")
+aiohttp_client.async_create_clientsession = lambda hass: None
+update_coordinator = _stub("homeassistant.helpers.update_coordinator")
+
+
+class DataUpdateCoordinator:
+    def __init__(self, hass, logger, *, name, update_interval=None, **kwargs):
+        self.hass = hass
+        self.logger = logger
+        self.name = name
+        self.update_interval = update_interval
+        self.data = None
+        self.refreshes_scheduled = 0
+        self.listeners = []
+        self.shut_down = False
+
+    def _schedule_refresh(self):
+        self.refreshes_scheduled += 1
+
+    def async_add_listener(self, listener):
+        self.listeners.append(listener)
+        return lambda: self.listeners.remove(listener)
+
+    async def async_refresh(self):
+        self.data = await self._async_update_data()
+        for listener in list(self.listeners):
+            listener()
+
+    async def async_shutdown(self):
+        self.shut_down = True
+
+    def async_set_updated_data(self, data):
+        self.data = data
+        self._schedule_refresh()
+
+
+class UpdateFailed(Exception):
+    pass
+
+
+update_coordinator.DataUpdateCoordinator = DataUpdateCoordinator
+update_coordinator.UpdateFailed = UpdateFailed
+storage = _stub("homeassistant.helpers.storage")
+
+
+class Store:
+    """Keeps its data in ``hass.storage`` (when the fake hass has one), like files on disk."""
+
+    def __init__(self, hass, version, key, **kwargs):
+        self.version = version
+        self.key = key
+        self._disk = getattr(hass, "storage", {})
+
+    @property
+    def data(self):
+        return self._disk.get(self.key)
+
+    async def async_load(self):
+        return self.data
+
+    def async_delay_save(self, data_func, delay=0):
+        self._disk[self.key] = data_func()
+
+    async def async_save(self, data):
+        self._disk[self.key] = data
+
+
+storage.Store = Store
+storage.STORAGE_DIR = ".storage"
 config_validation = _stub("homeassistant.helpers.config_validation")
 config_validation.string = str
+config_validation.boolean = bool
 config_validation.ensure_list = lambda v: v if isinstance(v, list) else [v]
+config_validation.time_period = lambda v: v if isinstance(v, timedelta) else timedelta(seconds=v)
 const = _stub("homeassistant.const")
 const.CONF_PASSWORD = "password"
 const.CONF_USERNAME = "username"
@@ -39,9 +126,16 @@ const.CONF_ID = "id"
 ha.components = ha_components
 ha.helpers = helpers
 ha.const = const
+ha.core = core
+ha.exceptions = exceptions
 ha_components.climate = climate
 ha_components.water_heater = water_heater
+ha_components.sensor = sensor
+ha_components.binary_sensor = binary_sensor
 helpers.discovery = discovery
+helpers.aiohttp_client = aiohttp_client
+helpers.update_coordinator = update_coordinator
+helpers.storage = storage
 helpers.config_validation = config_validation
 
 # Make `import salus_it500` resolve to the custom component package.
@@ -58,10 +152,52 @@ def mod():
 
 @pytest.fixture
 def salus(mod):
-    """A ``Salus`` client wired to a fake HTTP session."""
+    """A ``Salus`` device client whose account is wired to a fake HTTP session."""
     from fakes import FakeSession
 
-    client = mod.Salus("user@example.com", "secret", "DEV1")
     fake = FakeSession()
-    client._session = fake
+    account = mod.SalusAccount("user@example.com", "secret", session=fake)
+    account.retry = mod.RetryPolicy(base_delay=0)  # retry without sleeping
+    client = account.device("DEV1")
+    client.WRITE_DEBOUNCE = 0.01  # keep write tests fast
     return client, fake
+
+
+@pytest.fixture
+async def salus_server():
+    """A ``SalusServer`` stand-in for salus-it500.com listening on a local port."""
+    from aiohttp.test_utils import TestServer
+    from salus_server import SalusServer
+
+    server = SalusServer()
+    test_server = TestServer(server.app)
+    await test_server.start_server()
+    server.base_url = str(test_server.make_url("")).rstrip("/")
+    yield server
+    await test_server.close()
+
+
+@pytest.fixture
+async def live_account(mod, salus_server):
+    """An account talking to ``salus_server`` over real sockets, with short timeouts."""
+    import aiohttp
+
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=mod.SalusAccount.CONNECTION_LIMIT,
+            keepalive_timeout=mod.SalusAccount.KEEPALIVE_TIMEOUT,
+        ),
+        cookie_jar=aiohttp.CookieJar(unsafe=True),  # the server is on an IP address
+    )
+    account = mod.SalusAccount(
+        salus_server.username,
+        salus_server.password,
+        session=session,
+        connect_timeout=1,
+        read_timeout=1,
+        deadline=5,
+    )
+    account.retry = mod.RetryPolicy(base_delay=0.01, max_delay=0.05, deadline=5)
+    salus_server.point(account)
+    yield account
+    await session.close()
@@ -1,9 +1,45 @@
-"""A fake ``requests.Session`` for exercising the Salus client offline."""
+"""A fake ``aiohttp.ClientSession`` for exercising the Salus client offline."""
+import json
+
+import aiohttp
+
+
+class FakeStream:
+    """The ``response.content`` stream; ``chunk_size`` overrides the reader's."""
+
+    def __init__(self, body, chunk_size=None):
+        self._body = body
+        self._chunk_size = chunk_size
+        self.bytes_read = 0
+
+    async def iter_chunked(self, n):
+        n = self._chunk_size or n
+        while self.bytes_read < len(self._body):
+            chunk = self._body[self.bytes_read:self.bytes_read + n]
+            self.bytes_read += len(chunk)
+            yield chunk
 
 
 class FakeResponse:
-    def __init__(self, text):
-        self.text = text
+    def __init__(self, text, gate=None, chunk_size=None):
+        self._text = text
+        self._gate = gate
+        self.status = 200
+        self.content = FakeStream(text.encode(), chunk_size)
+
+    async def __aenter__(self):
+        if self._gate is not None:
+            await self._gate.wait()
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def text(self):
+        return self._text
+
+    async def read(self):
+        return self._text.encode()
 
     def __bool__(self):
         return True
@@ -15,29 +51,65 @@ class FakeSession:
     Set ``token_html`` to control what the control page scrape sees, and
     ``values_queue`` to a list to hand out per-call bodies (used for retry
     tests); otherwise ``values_text`` is returned for every values request.
+    Map a URL substring to an ``asyncio.Event`` in ``gates`` to hold matching
+    responses until the test sets it. ``chunk_size`` sets how the control page
+    is streamed, and ``responses`` keeps every response handed out.
+    ``set_statuses`` hands out HTTP statuses for the next set.php POSTs.
     """
 
     DEFAULT_VALUES = '{"CH1currentRoomTemp": "20.5", "CH1currentSetPoint": "21.0", "HWonOffStatus": "1"}'
+    DEFAULT_VALUES_DICT = json.loads(DEFAULT_VALUES)
 
     def __init__(self):
         self.calls = []  # list of (method, url, payload-or-params)
+        self.timeouts = []  # the timeout passed with each call, in call order
+        self.responses = []
+        self.chunk_size = None
         self.token_html = '<input id="token" type="hidden" value="TOK123" />'
         self.values_text = self.DEFAULT_VALUES
         self.values_queue = None
+        self.set_statuses = []
+        self.gates = {}
+        self.closed = False
+        self._cookie_jar = None
 
-    def post(self, url, data=None, headers=None):
+    @property
+    def cookie_jar(self):
+        # a real jar, created lazily because it needs a running loop
+        if self._cookie_jar is None:
+            self._cookie_jar = aiohttp.CookieJar()
+        return self._cookie_jar
+
+    def _gate(self, url):
+        for substr, gate in self.gates.items():
+            if substr in url:
+                return gate
+        return None
+
+    def post(self, url, data=None, headers=None, timeout=None):
         self.calls.append(("POST", url, data))
-        return FakeResponse("ok")
+        self.timeouts.append(timeout)
+        response = FakeResponse("ok", self._gate(url))
+        if "set.php" in url and self.set_statuses:
+            response.status = self.set_statuses.pop(0)
+        return response
 
-    def get(self, url, params=None):
+    def get(self, url, params=None, timeout=None):
         self.calls.append(("GET", url, params))
+        self.timeouts.append(timeout)
+        gate = self._gate(url)
         if "control.php" in url:
-            return FakeResponse(self.token_html)
+            response = FakeResponse(self.token_html, gate, self.chunk_size)
+            self.responses.append(response)
+            return response
         if "ajax_device_values.php" in url:
             if self.values_queue is not None:
-                return FakeResponse(self.values_queue.pop(0))
-            return FakeResponse(self.values_text)
-        return FakeResponse("ok")
+                return FakeResponse(self.values_queue.pop(0), gate)
+            return FakeResponse(self.values_text, gate)
+        return FakeResponse("ok", gate)
+
+    async def close(self):
+        self.closed = True
 
 
 def count(session, substr, method=None):
@@ -0,0 +1,219 @@
+"""A local aiohttp.web stand-in for salus-it500.com.
+
+Serves the four endpoints the client uses (``login.php``, ``control.php``,
+``ajax_device_values.php`` and ``set.php``) over real sockets, with knobs
+for latency, random errors, session expiry and rate limiting. Tests get it
+through the ``salus_server`` fixture; for a manual soak run point an account
+at ``python tests/salus_server.py --port 8080`` with ``server.point(account)``
+or by setting the account's ``*_URL`` attributes.
+"""
+import argparse
+import asyncio
+import json
+import random
+import secrets
+import time
+
+from aiohttp import web
+
+LOGIN_PATH = "/public/login.php"
+CONTROL_PATH = "/public/control.php"
+VALUES_PATH = "/public/ajax_device_values.php"
+SET_PATH = "/includes/set.php"
+
+COOKIE = "PHPSESSID"
+# What the real site answers with once the session is gone: a login page, not JSON.
+LOGIN_PAGE = "<!DOCTYPE html><html><body><form action=\"login.php\">Login</form></body></html>"
+
+
+class SalusServer:
+    """State and handlers of the stand-in; ``app`` is the aiohttp application.
+
+    ``latency`` delays every response (seconds, or a ``(low, high)`` range),
+    ``error_rate`` is the share of requests answered with a 500,
+    ``session_ttl`` expires logins after that many seconds, and
+    ``rate_limit`` as ``(requests, seconds)`` answers 429 past that rate.
+    ``page_padding`` bytes of markup precede the token input on the control
+    page, sent in ``body_chunk`` sized pieces ``body_delay`` apart, to imitate
+    a slow body.
+    """
+
+    def __init__(
+        self,
+        username="user@example.com",
+        password="secret",
+        devices=("DEV1",),
+        latency=0.0,
+        error_rate=0.0,
+        session_ttl=None,
+        rate_limit=None,
+        page_padding=0,
+        body_chunk=4096,
+        body_delay=0.0,
+        seed=0,
+    ):
+        self.username = username
+        self.password = password
+        self.values = {
+            deviceId: {
+                "CH1currentRoomTemp": "20.5",
+                "CH1currentSetPoint": "21.0",
+                "CH1heatOnOffStatus": "0",
+                "CH1heatOnOff": "0",
+                "HWonOffStatus": "1",
+                "frost": "7.0",
+            }
+            for deviceId in devices
+        }
+        self.latency = latency
+        self.error_rate = error_rate
+        self.session_ttl = session_ttl
+        self.rate_limit = rate_limit
+        self.page_padding = page_padding
+        self.body_chunk = body_chunk
+        self.body_delay = body_delay
+        self.sessions = {}  # session id -> login time
+        self.tokens = {}  # (session id, device id) -> token
+        self.hits = {}  # path -> number of requests
+        self.peers = set()  # client (host, port) pairs, i.e. TCP connections seen
+        self.base_url = None
+        self._random = random.Random(seed)
+        self._recent = []  # request times inside the rate limit window
+
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.router.add_post(LOGIN_PATH, self._login)
+        self.app.router.add_get(CONTROL_PATH, self._control)
+        self.app.router.add_get(VALUES_PATH, self._values)
+        self.app.router.add_post(SET_PATH, self._set)
+
+    def url(self, path) -> str:
+        return f"{self.base_url}{path}"
+
+    def point(self, account) -> None:
+        """Send an account's requests here instead of to salus-it500.com."""
+        account.LOGIN_URL = self.url(LOGIN_PATH)
+        account.CONTROL_URL = self.url(CONTROL_PATH)
+        account.VALUES_URL = self.url(VALUES_PATH)
+        account.SET_URL = self.url(SET_PATH)
+
+    def expire_sessions(self) -> None:
+        """Drop every login at once, as the site does now and then."""
+        self.sessions.clear()
+        self.tokens.clear()
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        self.hits[request.path] = self.hits.get(request.path, 0) + 1
+        self.peers.add(request.transport.get_extra_info("peername"))
+
+        latency = self.latency
+        if isinstance(latency, tuple):
+            latency = self._random.uniform(*latency)
+        if latency:
+            await asyncio.sleep(latency)
+
+        if self.rate_limit is not None:
+            limit, window = self.rate_limit
+            now = time.monotonic()
+            self._recent = [t for t in self._recent if now - t < window]
+            if len(self._recent) >= limit:
+                return web.Response(status=429, text="Too Many Requests")
+            self._recent.append(now)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            return web.Response(status=500, text="Internal Server Error")
+        return await handler(request)
+
+    def _session(self, request):
+        sid = request.cookies.get(COOKIE)
+        login_time = self.sessions.get(sid)
+        if login_time is None:
+            return None
+        if self.session_ttl is not None and time.monotonic() - login_time >= self.session_ttl:
+            del self.sessions[sid]
+            return None
+        return sid
+
+    def _token_ok(self, request, params):
+        sid = self._session(request)
+        deviceId = params.get("devId")
+        return (
+            sid is not None
+            and deviceId in self.values
+            and self.tokens.get((sid, deviceId)) == params.get("token")
+        )
+
+    async def _login(self, request):
+        form = await request.post()
+        response = web.Response(text="<html><body>Welcome</body></html>", content_type="text/html")
+        if form.get("IDemail") == self.username and form.get("password") == self.password:
+            sid = secrets.token_hex(16)
+            self.sessions[sid] = time.monotonic()
+            response.set_cookie(COOKIE, sid, path="/")
+        return response
+
+    async def _control(self, request):
+        sid = self._session(request)
+        deviceId = request.query.get("devId")
+        if sid is None or deviceId not in self.values:
+            return web.Response(text=LOGIN_PAGE, content_type="text/html")
+
+        token = self.tokens.setdefault((sid, deviceId), secrets.token_hex(8))
+        body = (
+            "<html><body>"
+            + "<!-- padding -->" * (self.page_padding // 16)
+            + f'<input id="token" type="hidden" value="{token}" />'
+            + "</body></html>"
+        ).encode()
+
+        response = web.StreamResponse(headers={"Content-Type": "text/html"})
+        await response.prepare(request)
+        for start in range(0, len(body), self.body_chunk):
+            if self.body_delay:
+                await asyncio.sleep(self.body_delay)
+            await response.write(body[start:start + self.body_chunk])
+        await response.write_eof()
+        return response
+
+    async def _values(self, request):
+        if not self._token_ok(request, request.query):
+            return web.Response(text=LOGIN_PAGE, content_type="text/html")
+        return web.Response(text=json.dumps(self.values[request.query["devId"]]), content_type="text/html")
+
+    async def _set(self, request):
+        form = await request.post()
+        if not self._token_ok(request, form):
+            return web.Response(text=LOGIN_PAGE, content_type="text/html")
+
+        values = self.values[form["devId"]]
+        if "current_tempZ1" in form:
+            values["CH1currentSetPoint"] = form["current_tempZ1"]
+        if "auto" in form:
+            values["CH1heatOnOff"] = form["auto"]
+        if "hwmode_once" in form:
+            values["HWonOffStatus"] = "1"
+        if "hwmode_off" in form:
+            values["HWonOffStatus"] = "0"
+        return web.Response(text="ok")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for salus-it500.com.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with 500")
+    parser.add_argument("--session-ttl", type=float, help="seconds a login stays valid")
+    parser.add_argument("--rate-limit", type=int, help="requests per second before answering 429")
+    args = parser.parse_args(argv)
+
+    server = SalusServer(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        session_ttl=args.session_ttl,
+        rate_limit=(args.rate_limit, 1.0) if args.rate_limit else None,
+    )
+    web.run_app(server.app, host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Unit tests for the coordinator's adaptive poll scheduling."""
+from datetime import timedelta
+
+from fakes import FakeSession
+
+FAST = timedelta(seconds=30)
+BASE = timedelta(minutes=2)
+CEILING = timedelta(minutes=15)
+
+
+def values(room="20.0", setpoint="21.0", heating="0", hw="0"):
+    from salus_it500.models import DeviceState
+
+    return DeviceState.from_values(
+        {
+            "CH1currentRoomTemp": room,
+            "CH1currentSetPoint": setpoint,
+            "CH1heatOnOffStatus": heating,
+            "HWonOffStatus": hw,
+        }
+    )
+
+
+def adaptive():
+    from salus_it500.coordinator import AdaptiveInterval
+
+    return AdaptiveInterval(fast=FAST, base=BASE, ceiling=CEILING)
+
+
+def test_stable_readings_back_off_up_to_the_ceiling():
+    sched = adaptive()
+
+    assert sched.update({"DEV1": values()}) == BASE  # first reading is a change
+    intervals = [sched.update({"DEV1": values()}) for _ in range(10)]
+
+    assert intervals[0] > BASE
+    assert intervals == sorted(intervals)
+    assert intervals[-1] == CEILING
+
+
+def test_room_heading_for_setpoint_polls_fast():
+    sched = adaptive()
+    sched.update({"DEV1": values(room="19.0", heating="1")})
+
+    assert sched.update({"DEV1": values(room="19.5", heating="1")}) == FAST
+
+
+def test_change_away_from_setpoint_resets_to_base():
+    sched = adaptive()
+    sched.update({"DEV1": values(room="20.0")})
+    for _ in range(5):
+        sched.update({"DEV1": values(room="20.0")})
+
+    assert sched.update({"DEV1": values(room="19.5")}) == BASE
+
+
+def test_write_polls_fast_for_the_write_window():
+    sched = adaptive()
+    sched.update({"DEV1": values()})
+
+    assert sched.note_write() == FAST
+    assert sched.update({"DEV1": values()}) == FAST  # stable, but a command just went out
+
+    sched._last_write -= sched.write_window.total_seconds() + 1
+    assert sched.update({"DEV1": values()}) > BASE
+
+
+async def test_write_through_client_reschedules_the_coordinator(mod):
+    from salus_it500.coordinator import SalusCoordinator
+
+    account = mod.SalusAccount("user", "pass", session=FakeSession())
+    coordinator = SalusCoordinator(None, account, CEILING)
+    coordinator.update_interval = CEILING
+
+    client = account.device("DEV1")
+    client.WRITE_DEBOUNCE = 0
+    await client._set_data({"hwmode_off": "1"})
+
+    assert coordinator.update_interval == coordinator.adaptive.fast
+    assert coordinator.refreshes_scheduled == 1
+
+
+async def test_write_pushes_patched_values_to_entities(mod):
+    from salus_it500.coordinator import SalusCoordinator
+
+    account = mod.SalusAccount("user", "pass", session=FakeSession())
+    client = account.device("DEV1")
+    client.WRITE_DEBOUNCE = 0
+    coordinator = SalusCoordinator(None, account, CEILING)
+    coordinator.data = {"DEV1": await client._get_data()}
+
+    await client._set_data({"hwmode_off": "1"})
+
+    assert coordinator.data["DEV1"].hot_water is False
+    assert coordinator.update_interval == coordinator.adaptive.fast
+
+
+async def test_restored_devices_stay_stale_until_read(mod):
+    from salus_it500.coordinator import SalusCoordinator
+
+    account = mod.SalusAccount("user", "pass", session=FakeSession())
+    account.device("DEV1")
+    coordinator = SalusCoordinator(None, account, CEILING)
+    coordinator.restore_snapshot({"DEV1": values()})
+
+    assert coordinator.data["DEV1"] == values()
+    assert coordinator.stale == {"DEV1"}
+
+    await coordinator._async_update_data()
+
+    assert coordinator.stale == set()
+
+
+async def test_changes_list_only_the_fields_that_differ(mod):
+    from salus_it500.coordinator import SalusCoordinator, ALL_FIELDS
+
+    fake = FakeSession()
+    account = mod.SalusAccount("user", "pass", session=fake)
+    client = account.device("DEV1")
+    coordinator = SalusCoordinator(None, account, CEILING)
+
+    coordinator.data = await coordinator._async_update_data()
+    assert coordinator.changed("DEV1") == ALL_FIELDS  # first read: everything is new
+
+    client._data_time -= 3600
+    coordinator.data = await coordinator._async_update_data()
+    assert coordinator.changed("DEV1") == frozenset()  # identical body
+
+    client._data_time -= 3600
+    fake.values_text = fake.values_text.replace('"21.0"', '"22.0"')
+    coordinator.data = await coordinator._async_update_data()
+    assert coordinator.changed("DEV1") == {"target_temperature"}
+
+
+async def test_confirmed_snapshot_reports_the_stale_flag_change(mod):
+    from salus_it500.coordinator import SalusCoordinator
+
+    account = mod.SalusAccount("user", "pass", session=FakeSession())
+    client = account.device("DEV1")
+    coordinator = SalusCoordinator(None, account, CEILING)
+    restored = account.restore_snapshot({"DEV1": {"values": FakeSession.DEFAULT_VALUES_DICT, "time": 0}})
+    coordinator.restore_snapshot(restored)
+
+    coordinator.data = await coordinator._async_update_data()
+
+    assert coordinator.changed("DEV1") == {"stale"}  # same values, now confirmed
+
+
+def test_new_intervals_clamp_the_current_one():
+    interval = adaptive()
+    interval.interval = CEILING
+
+    assert interval.configure(FAST, BASE, timedelta(minutes=5)) == timedelta(minutes=5)
+    assert interval.configure(timedelta(minutes=10), timedelta(minutes=10), CEILING) == timedelta(minutes=10)
@@ -0,0 +1,115 @@
+"""Unit tests for the heating rate model and the polls it schedules."""
+from datetime import timedelta
+
+import pytest
+
+
+def state(room, target=21.0, heating=True):
+    from salus_it500.models import DeviceState
+
+    return DeviceState(room_temperature=room, target_temperature=target, heating=heating)
+
+
+def model():
+    from salus_it500.heating import HeatingRateModel
+
+    return HeatingRateModel()
+
+
+def warm(heating_model, start=18.0, rate=1.0, reads=6, every=600):
+    """Feed reads of a room warming at ``rate`` °C per hour; returns the last time."""
+    for n in range(reads):
+        heating_model.observe(n * every, state(start + rate * n * every / 3600))
+    return (reads - 1) * every
+
+
+def test_constant_warming_predicts_a_linear_crossing():
+    heating_model = model()
+    warm(heating_model, start=18.0, rate=1.0)
+
+    assert heating_model.rate(19.0) == pytest.approx(1.0, abs=0.01)
+    # 18.83 °C after 50 minutes, 2.17 °C to go at 1 °C/h
+    assert heating_model.time_to_target(state(18.0 + 5 / 6)) == pytest.approx(2.17 * 3600, rel=0.01)
+
+
+def test_slowing_warming_is_fitted_with_losses():
+    heating_model = model()
+    # the rate falls by 0.5 °C/h per degree: 2 °C/h at 18 °C, 1 °C/h at 20 °C
+    temperature, t = 17.0, 0
+    for _ in range(20):
+        rate = 2.0 - 0.5 * (temperature - 18.0)
+        heating_model.observe(t, state(temperature))
+        temperature += rate * 300 / 3600
+        t += 300
+
+    assert heating_model.theta[1] == pytest.approx(-0.5, abs=0.05)
+    assert heating_model.time_to_target(state(19.0, target=20.0)) > 3600 / 1.5 * 0.9
+
+
+def test_no_prediction_without_enough_data_or_heating():
+    heating_model = model()
+    assert heating_model.time_to_target(state(19.0)) is None
+
+    warm(heating_model)
+    assert heating_model.time_to_target(state(19.0, heating=False)) is None
+    assert heating_model.time_to_target(state(22.0)) == 0.0
+
+
+def test_idle_and_far_apart_reads_are_not_fitted():
+    heating_model = model()
+    heating_model.observe(0, state(18.0))
+    heating_model.observe(600, state(18.5, heating=False))
+    heating_model.observe(1200, state(18.4))
+    heating_model.observe(1200 + 3 * 3600, state(20.0))
+
+    assert heating_model.samples == 0
+
+
+def test_a_cooling_fit_never_reaches_the_target():
+    heating_model = model()
+    warm(heating_model, rate=-0.5)
+
+    assert heating_model.time_to_target(state(18.0)) is None
+
+
+# --- scheduling ---------------------------------------------------------------
+
+def test_converging_room_polls_just_before_the_predicted_crossing():
+    from salus_it500.coordinator import AdaptiveInterval
+
+    interval = AdaptiveInterval(
+        fast=timedelta(seconds=30), base=timedelta(minutes=2), ceiling=timedelta(minutes=15)
+    )
+    interval.update({"DEV1": state(18.0)})
+
+    assert interval.update({"DEV1": state(18.5)}, {"DEV1": 600}) == timedelta(seconds=570)
+    assert interval.update({"DEV1": state(19.0)}, {"DEV1": 10}) == timedelta(seconds=30)
+    assert interval.update({"DEV1": state(19.5)}, {"DEV1": 7200}) == timedelta(minutes=15)
+    assert interval.update({"DEV1": state(20.0)}, {}) == timedelta(seconds=30)  # no prediction
+
+
+async def test_coordinator_learns_from_fresh_reads(mod, monkeypatch):
+    import time
+
+    from fakes import FakeSession
+    from salus_it500.coordinator import SalusCoordinator
+
+    clock = [1_700_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    fake = FakeSession()
+    account = mod.SalusAccount("user", "pass", session=fake)
+    salus = account.device("DEV1")
+    coordinator = SalusCoordinator(None, account)
+
+    for n in range(5):  # reads ten minutes apart, 0.2 °C warmer each
+        fake.values_text = (
+            '{"CH1currentRoomTemp": "%.1f", "CH1currentSetPoint": "21.0", "CH1heatOnOffStatus": "1"}'
+            % (18.0 + n * 0.2)
+        )
+        salus._data_time -= mod.DATA_TTL
+        coordinator.data = await coordinator._async_update_data()
+        clock[0] += 600
+
+    assert coordinator.models["DEV1"].samples == 4
+    # 2.2 °C to go at 1.2 °C/h, minus the ten minutes since the last read
+    assert coordinator.time_to_target("DEV1") == pytest.approx(2.2 / 1.2 * 3600 - 600, rel=0.02)
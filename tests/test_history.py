@@ -0,0 +1,125 @@
+"""Unit tests for the array-backed per-device history."""
+import asyncio
+
+import pytest
+
+from fakes import count
+
+
+def reading(room=20.0, target=21.0, heating=False):
+    from salus_it500.models import DeviceState
+
+    return DeviceState(room_temperature=room, target_temperature=target, heating=heating)
+
+
+def history(size=10):
+    from salus_it500.history import History
+
+    return History(size)
+
+
+# --- ring buffer ------------------------------------------------------------
+
+def test_full_buffer_drops_the_oldest_readings():
+    buffer = history(size=3)
+    for t in range(5):
+        buffer.append(t, reading(room=20.0 + t))
+
+    assert len(buffer) == 3
+    assert [r["room_temperature"] for r in buffer.query(0, 1)] == [22.0, 23.0, 24.0]
+
+
+def test_query_downsamples_into_buckets():
+    buffer = history()
+    buffer.append(0, reading(room=20.0, heating=True))
+    buffer.append(30, reading(room=21.0, heating=False))
+    buffer.append(60, reading(room=22.0, heating=True))
+
+    first, second = buffer.query(0, 60)
+
+    assert first == {
+        "time": 0,
+        "room_temperature": 20.5,
+        "target_temperature": 21.0,
+        "heating": 0.5,
+        "readings": 2,
+    }
+    assert second["time"] == 60 and second["readings"] == 1
+
+
+def test_query_skips_older_readings_and_missing_values():
+    buffer = history()
+    buffer.append(0, reading(room=18.0))
+    buffer.append(100, reading(room=None, heating=None))
+
+    (bucket,) = buffer.query(50, 60)
+
+    assert bucket["room_temperature"] is None
+    assert bucket["heating"] is None
+
+
+# --- file format ------------------------------------------------------------
+
+def test_bytes_round_trip_keeps_the_newest_that_fit():
+    buffer = history(size=4)
+    for t in range(6):
+        buffer.append(t, reading(room=20.0 + t, heating=t % 2 == 0))
+
+    restored = history(size=3)
+    restored.load_bytes(buffer.to_bytes())
+
+    assert len(restored) == 3
+    assert [r["time"] for r in restored.query(0, 1)] == [3, 4, 5]
+    assert restored.query(0, 1)[-1]["heating"] == 0.0
+
+
+def test_every_reading_costs_17_bytes_on_disk():
+    buffer = history(size=100)
+    for t in range(100):
+        buffer.append(t, reading())
+
+    assert len(buffer.to_bytes()) == 8 + 100 * 17
+
+
+@pytest.mark.parametrize("data", [b"", b"nope", b"SLH\x01\xff\x00\x00\x00"])
+def test_malformed_files_are_rejected(data):
+    with pytest.raises(ValueError):
+        history().load_bytes(data)
+
+
+# --- recording and the service ----------------------------------------------
+
+async def test_reads_are_recorded_and_served_by_the_service(salus, mod):
+    client, fake = salus
+    await client._get_data()
+
+    class Hass:
+        data = {mod.DOMAIN: {"DEV1": type("Coordinator", (), {"account": client._account})}}
+
+    result = mod._get_history(Hass, mod.GET_HISTORY_SCHEMA({"id": "DEV1"}))
+
+    (bucket,) = result["readings"]
+    assert bucket["room_temperature"] == 20.5
+    assert bucket["time"].endswith("+00:00")
+
+
+async def test_unconfirmed_reads_are_not_recorded(salus):
+    client, fake = salus
+    fake.gates["ajax_device_values.php"] = gate = asyncio.Event()
+
+    fetch = asyncio.ensure_future(client._get_data())
+    while not count(fake, "ajax_device_values.php"):
+        await asyncio.sleep(0)
+    client._apply_write({"hwmode_off": "1"})  # a write overtakes the read
+    gate.set()
+    await fetch
+
+    assert len(client.history) == 0
+
+
+def test_unknown_device_is_an_error(mod):
+    class Hass:
+        data = {}
+
+    with pytest.raises(mod.HomeAssistantError):
+        mod._get_history(Hass, mod.GET_HISTORY_SCHEMA({"id": "NOPE"}))
@@ -0,0 +1,103 @@
+"""Unit tests for the client metrics (histograms, cache and retry counters)."""
+import asyncio
+
+from fakes import FakeSession
+
+
+# --- histogram --------------------------------------------------------------
+
+def test_histogram_buckets_and_percentiles():
+    from salus_it500.metrics import Histogram
+
+    histogram = Histogram()
+    for seconds in (0.01, 0.02, 0.03, 0.2, 3.0):
+        histogram.observe(seconds)
+
+    assert histogram.count == 5
+    assert histogram.max == 3.0
+    assert histogram.percentile(50) == 0.05  # upper bound of the first bucket
+    assert histogram.percentile(99) == 3.0   # capped at the largest value seen
+    assert histogram.as_dict()["buckets"]["le_0.05"] == 3
+
+
+def test_empty_histogram_has_no_percentiles():
+    from salus_it500.metrics import Histogram
+
+    histogram = Histogram()
+
+    assert histogram.mean is None
+    assert histogram.percentile(50) is None
+
+
+# --- client instrumentation -------------------------------------------------
+
+async def test_reads_record_latency_and_cache_hits(salus):
+    client, fake = salus
+    metrics = client._account.metrics
+
+    await client._get_data()
+    await client._get_data()
+
+    assert metrics.cache_misses == 1
+    assert metrics.cache_hits == 1
+    assert metrics.cache_hit_ratio == 0.5
+    assert metrics.logins == 1
+    assert metrics.token_refreshes == 1
+    for endpoint in ("login", "control", "values"):
+        assert metrics.latency[endpoint].count == 1
+    assert metrics.latency["set"].count == 0
+
+
+async def test_readers_joining_a_fetch_are_counted(salus):
+    client, fake = salus
+    metrics = client._account.metrics
+    fake.gates["ajax_device_values.php"] = gate = asyncio.Event()
+
+    readers = [asyncio.ensure_future(client._get_data()) for _ in range(3)]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(*readers)
+
+    assert metrics.cache_misses == 3
+    assert metrics.cache_joins == 2
+
+
+async def test_failed_attempts_count_as_errors_and_retries(salus):
+    client, fake = salus
+    metrics = client._account.metrics
+    fake.values_queue = ["<html>logged out</html>", FakeSession.DEFAULT_VALUES]
+
+    await client._get_data()
+
+    assert metrics.retries["values"] == 1
+    assert metrics.latency["values"].count == 2
+    assert metrics.token_refreshes == 2  # the bad body dropped the token
+
+
+async def test_transport_errors_are_counted_per_endpoint(salus, mod):
+    client, fake = salus
+    metrics = client._account.metrics
+    client._account.retry = mod.RetryPolicy(max_attempts=1)
+
+    def broken(*args, **kwargs):
+        raise OSError("connection refused")
+
+    fake.post = broken
+
+    try:
+        await client._get_data()
+    except Exception:
+        pass
+
+    assert metrics.errors["login"] == 1
+
+
+async def test_diagnostics_include_the_metrics(salus):
+    client, fake = salus
+
+    await client._get_data()
+    diagnostics = client._account.diagnostics()
+
+    assert diagnostics["metrics"]["latency"]["values"]["count"] == 1
+    assert diagnostics["metrics"]["cache_misses"] == 1
+    assert diagnostics["metrics"]["lock_wait"]["count"] == 2  # login lock + token lock
@@ -0,0 +1,91 @@
+"""Unit tests for the parsed DeviceState model."""
+import dataclasses
+
+import pytest
+
+from salus_it500.models import DeviceState, DeviceStateError
+
+FULL = {
+    "CH1currentRoomTemp": "20.5",
+    "CH1currentSetPoint": "21.0",
+    "frost": "7.0",
+    "CH1heatOnOffStatus": "1",
+    "CH1heatOnOff": "0",
+    "HWonOffStatus": "1",
+    "CH1autoMode": "1",
+}
+
+
+def test_values_are_parsed_into_typed_fields():
+    state = DeviceState.from_values(FULL)
+
+    assert state.room_temperature == 20.5
+    assert state.target_temperature == 21.0
+    assert state.frost_temperature == 7.0
+    assert state.heating is True
+    assert state.heating_off is False
+    assert state.hot_water is True
+    assert dict(state.extra) == {"CH1autoMode": "1"}
+
+
+def test_missing_keys_become_none():
+    state = DeviceState.from_values({"HWonOffStatus": "0"})
+
+    assert state.hot_water is False
+    assert state.room_temperature is None
+    assert state.heating is None
+
+
+def test_malformed_number_raises_in_one_place():
+    with pytest.raises(DeviceStateError, match="CH1currentSetPoint"):
+        DeviceState.from_values({**FULL, "CH1currentSetPoint": "n/a"})
+
+
+def test_non_object_body_raises():
+    with pytest.raises(DeviceStateError):
+        DeviceState.from_values(["not", "an", "object"])
+
+
+def test_state_round_trips_through_cloud_values():
+    state = DeviceState.from_values(FULL)
+
+    assert DeviceState.from_values(state.as_values()) == state
+
+
+def test_state_is_immutable_and_slotted():
+    state = DeviceState.from_values(FULL)
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        state.hot_water = False
+    assert not hasattr(state, "__dict__")
+
+
+def test_raw_body_keeps_only_the_typed_fields():
+    import json
+
+    state = DeviceState.from_body(json.dumps(FULL).encode())
+
+    assert state == dataclasses.replace(DeviceState.from_values(FULL), extra=())
+
+
+def test_raw_body_parses_without_orjson(monkeypatch):
+    from salus_it500 import models
+
+    monkeypatch.setattr(models, "orjson", None)
+
+    assert DeviceState.from_body(b'{"HWonOffStatus": "1"}').hot_water is True
+    with pytest.raises(DeviceStateError):
+        DeviceState.from_body(b"{truncated")
+
+
+def test_logged_out_page_is_told_apart_by_its_first_byte():
+    from salus_it500.models import is_values_body
+
+    assert is_values_body(b' \n {"HWonOffStatus": "1"}')
+    assert not is_values_body(b"<html>session expired</html>")
+    assert not is_values_body(b"")
+
+
+def test_non_object_raw_body_raises():
+    with pytest.raises(DeviceStateError, match="Expected an object"):
+        DeviceState.from_body(b'["not", "an", "object"]')
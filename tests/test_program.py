@@ -0,0 +1,66 @@
+"""Tests for the apply_program service: validation and batched pushes."""
+import types
+
+import pytest
+import voluptuous as vol
+
+from fakes import FakeSession, calls_to, count
+
+LOGIN = "login.php"
+SET = "set.php"
+
+
+@pytest.fixture
+def hass(mod):
+    from salus_it500.coordinator import SalusCoordinator
+
+    fake = FakeSession()
+    account = mod.SalusAccount("user@example.com", "secret", session=fake)
+    account.retry = mod.RetryPolicy(base_delay=0)
+    for deviceId in ("DEV1", "DEV2"):
+        account.device(deviceId).WRITE_DEBOUNCE = 0.01
+    coordinator = SalusCoordinator(None, account)
+    return types.SimpleNamespace(data={mod.DOMAIN: {"DEV1": coordinator, "DEV2": coordinator}}, fake=fake)
+
+
+def program(mod, *steps):
+    return mod.APPLY_PROGRAM_SCHEMA({"steps": list(steps)})["steps"]
+
+
+def test_out_of_range_temperature_is_rejected(mod):
+    with pytest.raises(vol.Invalid):
+        program(mod, {"id": "DEV1", "temperature": 19}, {"id": "DEV1", "temperature": 40})
+
+
+def test_step_without_a_command_is_rejected(mod):
+    with pytest.raises(vol.Invalid):
+        program(mod, {"id": "DEV1"})
+
+
+async def test_steps_merge_into_one_post_per_device(mod, hass):
+    await mod._async_apply_program(
+        hass,
+        program(
+            mod,
+            {"id": "DEV1", "temperature": 18},
+            {"id": "DEV2", "heating": False},
+            {"id": "DEV1", "temperature": 21.5, "hot_water": True},
+            {"id": "DEV1", "hot_water": False},
+        ),
+    )
+
+    assert count(hass.fake, LOGIN) == 1
+    posts = {payload["devId"]: payload for _, _, payload in calls_to(hass.fake, SET)}
+    assert len(posts) == 2 and count(hass.fake, SET) == 2
+    assert posts["DEV1"]["current_tempZ1"] == 21.5
+    assert posts["DEV1"]["hwmode_off"] == "1" and "hwmode_once" not in posts["DEV1"]
+    assert posts["DEV2"]["auto"] == "1"
+
+
+async def test_unknown_device_fails_before_anything_is_sent(mod, hass):
+    with pytest.raises(mod.HomeAssistantError):
+        await mod._async_apply_program(
+            hass, program(mod, {"id": "DEV1", "temperature": 20}, {"id": "NOPE", "temperature": 20})
+        )
+
+    assert hass.fake.calls == []
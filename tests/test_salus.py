@@ -1,6 +1,5 @@
 """Unit tests for the shared Salus HTTP client (login + data caching + retries)."""
-import threading
-import time
+import asyncio
 
 import pytest
 
@@ -14,12 +13,12 @@ SET = "set.php"
 
 # --- token scraping / login -------------------------------------------------
 
-def test_first_read_logs_in_and_scrapes_token(salus):
+async def test_first_read_logs_in_and_scrapes_token(salus):
     client, fake = salus
 
-    data = client._get_data()
+    data = await client._get_data()
 
-    assert data["HWonOffStatus"] == "1"
+    assert data.hot_water is True
     assert client._token == "TOK123"
     # exactly one login round-trip: POST login + GET control page
     assert count(fake, LOGIN) == 1
@@ -32,11 +31,11 @@ def test_first_read_logs_in_and_scrapes_token(salus):
 
 # --- data cache -------------------------------------------------------------
 
-def test_second_read_within_ttl_is_served_from_cache(salus):
+async def test_second_read_within_ttl_is_served_from_cache(salus):
     client, fake = salus
 
-    first = client._get_data()
-    second = client._get_data()
+    first = await client._get_data()
+    second = await client._get_data()
 
     assert second is first  # same cached object, no re-parse
     # no extra network calls of any kind on the cached read
@@ -44,13 +43,13 @@ def test_second_read_within_ttl_is_served_from_cache(salus):
     assert count(fake, LOGIN) == 1
 
 
-def test_expired_data_cache_refetches_but_reuses_token(salus, mod):
+async def test_expired_data_cache_refetches_but_reuses_token(salus, mod):
     client, fake = salus
 
-    client._get_data()
+    await client._get_data()
     client._data_time -= mod.DATA_TTL + 1  # simulate the data cache going stale
 
-    client._get_data()
+    await client._get_data()
 
     assert count(fake, VALUES) == 2  # fresh fetch
     assert count(fake, LOGIN) == 1   # token still valid -> no re-login
@@ -58,30 +57,81 @@ def test_expired_data_cache_refetches_but_reuses_token(salus, mod):
 
 # --- token cache ------------------------------------------------------------
 
-def test_expired_token_triggers_relogin(salus, mod):
+async def test_expired_token_triggers_relogin(salus, mod):
     client, fake = salus
 
-    client._get_data()
-    client._token_time -= mod.TOKEN_TTL + 1  # token past its TTL
-    client._data_time -= mod.DATA_TTL + 1    # force an actual fetch
+    await client._get_data()
+    client._token_time -= mod.TOKEN_TTL + 1            # token past its TTL
+    client._account._login_time -= mod.TOKEN_TTL + 1   # and so is the login
+    client._data_time -= mod.DATA_TTL + 1              # force an actual fetch
 
-    client._get_data()
+    await client._get_data()
 
     assert count(fake, LOGIN) == 2  # re-authenticated
 
 
-# --- writes invalidate the cache -------------------------------------------
+async def test_expired_token_with_live_login_only_rescrapes(salus, mod):
+    client, fake = salus
+
+    await client._get_data()
+    client._token_time -= mod.TOKEN_TTL + 1
+    client._data_time -= mod.DATA_TTL + 1
+
+    await client._get_data()
+
+    assert count(fake, LOGIN) == 1    # account session still good
+    assert count(fake, CONTROL) == 2  # only the device token was refreshed
 
-def test_set_data_sends_token_and_invalidates_cache(salus):
+
+# --- change detection -------------------------------------------------------
+
+async def test_unchanged_body_reuses_the_parsed_state(salus, mod):
     client, fake = salus
 
-    client._get_data()
-    assert client._set_data({"hwmode_off": "1"}) is True
+    first = await client._get_data()
+    client._data_time -= mod.DATA_TTL + 1
+    second = await client._get_data()
 
-    # cache dropped so the device's new state is read back fresh
-    assert client._data is None
-    client._get_data()
     assert count(fake, VALUES) == 2
+    assert second is first  # same fingerprint: not parsed again
+
+
+async def test_changed_body_yields_a_new_state(salus, mod):
+    client, fake = salus
+
+    first = await client._get_data()
+    client._data_time -= mod.DATA_TTL + 1
+    fake.values_text = '{"HWonOffStatus": "0"}'
+    second = await client._get_data()
+
+    assert second is not first
+    assert second.hot_water is False
+
+
+async def test_unchanged_body_after_a_write_drops_the_patch(salus, mod):
+    client, fake = salus
+
+    await client._get_data()
+    await client._set_data({"hwmode_off": "1"})  # patched to off
+    client._data_time -= mod.DATA_TTL + 1
+    data = await client._get_data()  # but the cloud still says on
+
+    assert data.hot_water is True
+
+
+# --- writes patch the cache ------------------------------------------------
+
+async def test_set_data_sends_token_and_patches_cache(salus):
+    client, fake = salus
+
+    await client._get_data()
+    assert await client._set_data({"hwmode_off": "1"}) is True
+
+    # the command's effect is visible at once, without another read
+    data = await client._get_data()
+    assert data.hot_water is False
+    assert data.room_temperature == 20.5  # untouched fields survive
+    assert count(fake, VALUES) == 1
 
     (_, _, payload) = calls_to(fake, SET)[0]
     assert payload["token"] == "TOK123"
@@ -90,67 +140,563 @@ def test_set_data_sends_token_and_invalidates_cache(salus):
     assert count(fake, LOGIN) == 1  # reused the existing valid token
 
 
+async def test_setpoint_and_mode_commands_patch_their_fields(salus):
+    client, fake = salus
+
+    await client._get_data()
+    await asyncio.gather(
+        client._set_data({"current_tempZ1_set": "1", "current_tempZ1": 22.5}),
+        client._set_data({"auto": "1", "auto_setZ1": "1"}),
+    )
+
+    assert client._data.target_temperature == 22.5
+    assert client._data.heating_off is True
+
+
+async def test_write_without_cached_read_leaves_cache_empty(salus):
+    client, fake = salus
+
+    await client._set_data({"hwmode_off": "1"})
+
+    assert client._data is None  # nothing to patch; next read is fresh
+
+
+async def test_fetch_overtaken_by_write_returns_patched_values(salus):
+    client, fake = salus
+    await client._get_data()
+    client._data_time -= 3600  # stale, but still there to patch
+    gate = fake.gates[VALUES] = asyncio.Event()
+
+    reader = asyncio.ensure_future(client._get_data())
+    while count(fake, VALUES) < 2:
+        await asyncio.sleep(0)
+    await client._set_data({"hwmode_off": "1"})
+    gate.set()
+
+    assert (await reader).hot_water is False  # not the pre-write value
+
+
+# --- write batching ---------------------------------------------------------
+
+async def test_rapid_setpoints_collapse_into_one_post(salus):
+    client, fake = salus
+
+    results = await asyncio.gather(
+        *(client._set_data({"current_tempZ1_set": "1", "current_tempZ1": t}) for t in (20, 21, 22))
+    )
+
+    assert results == [True, True, True]  # every caller learns its command landed
+    (_, _, payload) = calls_to(fake, SET)[0]
+    assert count(fake, SET) == 1
+    assert payload["current_tempZ1"] == 22  # last value wins
+
+
+async def test_mode_and_setpoint_merge_into_one_post(salus):
+    client, fake = salus
+
+    await asyncio.gather(
+        client._set_data({"auto": "0", "auto_setZ1": "1"}),
+        client._set_data({"current_tempZ1_set": "1", "current_tempZ1": 21}),
+    )
+
+    (_, _, payload) = calls_to(fake, SET)[0]
+    assert count(fake, SET) == 1
+    assert payload["auto"] == "0"
+    assert payload["current_tempZ1"] == 21
+
+
+async def test_contradicting_commands_keep_only_the_last(salus):
+    client, fake = salus
+
+    await asyncio.gather(
+        client._set_data({"hwmode_once": "1"}),
+        client._set_data({"hwmode_off": "1"}),
+    )
+
+    (_, _, payload) = calls_to(fake, SET)[0]
+    assert "hwmode_once" not in payload
+    assert payload["hwmode_off"] == "1"
+
+
+async def test_writes_after_the_window_get_their_own_post(salus):
+    client, fake = salus
+
+    await client._set_data({"hwmode_once": "1"})
+    await client._set_data({"hwmode_off": "1"})
+
+    assert count(fake, SET) == 2
+
+
+async def test_a_retried_write_cannot_land_after_a_newer_one(salus):
+    client, fake = salus
+    await client._get_data()
+    client._account.retry.delay = lambda attempt: 0.05  # retry after the next write is queued
+    fake.set_statuses = [500]
+
+    first = asyncio.ensure_future(client._set_data({"current_tempZ1": "20"}))
+    while not count(fake, SET):
+        await asyncio.sleep(0)
+    await asyncio.gather(first, client._set_data({"current_tempZ1": "22"}))
+
+    assert [payload["current_tempZ1"] for _, _, payload in calls_to(fake, SET)] == ["20", "20", "22"]
+    assert client._data.target_temperature == 22.0
+
+
+async def test_failed_batch_is_reported_to_every_caller(salus):
+    client, fake = salus
+    fake.token_html = "<html>logged out</html>"
+
+    results = await asyncio.gather(
+        client._set_data({"hwmode_once": "1"}),
+        client._set_data({"auto": "1", "auto_setZ1": "1"}),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, Exception) for r in results)
+
+
 # --- retry logic ------------------------------------------------------------
 
-def test_bad_response_resets_token_and_retries(salus):
+async def test_bad_response_resets_token_and_retries(salus):
     client, fake = salus
     fake.values_queue = ["<html>session expired</html>", '{"HWonOffStatus": "0"}']
 
-    data = client._get_data()
+    data = await client._get_data()
 
-    assert data["HWonOffStatus"] == "0"
+    assert data.hot_water is False
     assert count(fake, VALUES) == 2
     assert count(fake, LOGIN) == 2  # token was reset, so it re-logged in
 
 
-def test_persistent_bad_response_raises_after_10_attempts(salus):
+async def test_persistent_bad_response_raises_after_10_attempts(salus):
     client, fake = salus
     fake.values_queue = ["not json"] * 20
 
     with pytest.raises(Exception):
-        client._get_data()
+        await client._get_data()
 
     assert count(fake, VALUES) == 10  # bounded retry budget
+    assert client._account.breaker.failures == 1  # one failed call, not ten
+    assert client._account.breaker.state == "closed"
+
+
+async def test_retry_stops_at_the_deadline(salus, mod):
+    client, fake = salus
+    client._account.retry = mod.RetryPolicy(base_delay=10, deadline=0.01)
+    fake.values_queue = ["not json"] * 20
+
+    with pytest.raises(Exception):
+        await client._get_data()
+
+    assert count(fake, VALUES) == 1  # the first backoff would overrun the deadline
+
+
+def test_backoff_grows_exponentially_up_to_the_cap(mod):
+    policy = mod.RetryPolicy(base_delay=1, max_delay=4)
 
+    for attempt, cap in [(1, 1), (2, 2), (3, 4), (6, 4)]:
+        delays = [policy.delay(attempt) for _ in range(50)]
+        assert all(0 <= d <= cap for d in delays)
+        assert len(set(delays)) > 1  # jittered
 
-def test_unparseable_token_page_raises(salus):
+
+# --- timeouts and deadlines -------------------------------------------------
+
+async def test_every_request_carries_connect_and_read_timeouts(salus):
+    client, fake = salus
+
+    await client._get_data()
+    await client._set_data({"hwmode_off": "1"})
+
+    assert len(fake.timeouts) == 4  # login, control page, values, set
+    assert all(t is client._account.timeout for t in fake.timeouts)
+    assert fake.timeouts[0].connect == 10
+    assert fake.timeouts[0].sock_read == 20
+
+
+async def test_hung_read_is_cut_off_at_the_call_deadline(salus, mod):
+    client, fake = salus
+    client._account.retry = mod.RetryPolicy(base_delay=0, deadline=0.05)
+    fake.gates[VALUES] = asyncio.Event()  # never answers
+
+    with pytest.raises(TimeoutError):
+        await client._get_data()
+
+
+async def test_hung_write_is_cut_off_at_the_call_deadline(salus, mod):
+    client, fake = salus
+    client._account.retry = mod.RetryPolicy(base_delay=0, deadline=0.05)
+    fake.gates[SET] = asyncio.Event()
+
+    with pytest.raises(TimeoutError):
+        await client._set_data({"hwmode_off": "1"})
+
+
+async def test_diagnostics_report_the_timeouts(mod):
+    account = mod.SalusAccount("user", "pass", session=FakeSession(), connect_timeout=3, read_timeout=7, deadline=30)
+
+    diagnostics = account.diagnostics()
+
+    assert diagnostics["connect_timeout"] == 3
+    assert diagnostics["read_timeout"] == 7
+    assert diagnostics["deadline"] == 30
+    assert diagnostics["breaker_state"] == "closed"
+
+
+# --- circuit breaker --------------------------------------------------------
+
+async def test_breaker_opens_and_serves_stale_cache(salus):
+    client, fake = salus
+    await client._get_data()
+    fake.values_queue = ["not json"] * 10 * client._account.breaker.threshold
+    for _ in range(client._account.breaker.threshold):
+        client._data_time -= 3600
+        with pytest.raises(Exception):
+            await client._get_data()
+
+    client._data_time -= 3600
+    data = await client._get_data()  # fails fast, falls back to the cache
+
+    assert client._account.breaker.state == "open"
+    assert data.hot_water is True
+    assert client._stale is True
+    calls = len(fake.calls)
+
+    await client._get_data()
+    assert len(fake.calls) == calls  # fails fast without touching the network
+
+
+async def test_open_breaker_without_cache_raises(salus, mod):
+    client, fake = salus
+    for _ in range(client._account.breaker.threshold):
+        client._account.breaker.record_failure()
+
+    with pytest.raises(mod.CircuitOpenError):
+        await client._get_data()
+    with pytest.raises(mod.CircuitOpenError):
+        await client._set_data({"hwmode_off": "1"})
+    assert fake.calls == []
+
+
+async def test_half_open_probe_success_closes_the_breaker(salus):
+    client, fake = salus
+    breaker = client._account.breaker
+    for _ in range(breaker.threshold):
+        breaker.record_failure()
+    breaker._opened_at -= breaker.reset_timeout + 1
+
+    assert breaker.state == "half_open"
+    data = await client._get_data()
+
+    assert data.hot_water is True
+    assert client._stale is False
+    assert breaker.state == "closed"
+
+
+async def test_half_open_probe_failure_reopens(salus):
+    client, fake = salus
+    breaker = client._account.breaker
+    for _ in range(breaker.threshold):
+        breaker.record_failure()
+    breaker._opened_at -= breaker.reset_timeout + 1
+    fake.values_queue = ["not json"] * 20
+
+    with pytest.raises(Exception):
+        await client._get_data()
+
+    assert breaker.state == "open"
+    assert count(fake, VALUES) == client._account.retry.max_attempts
+
+
+async def test_half_open_admits_a_single_probe(salus, mod):
+    client, fake = salus
+    account = client._account
+    breaker = account.breaker
+    for _ in range(breaker.threshold):
+        breaker.record_failure()
+    breaker._opened_at -= breaker.reset_timeout + 1
+    fake.gates[VALUES] = asyncio.Event()
+
+    probe = asyncio.ensure_future(client._get_data())
+    while not count(fake, VALUES):
+        await asyncio.sleep(0)
+    with pytest.raises(mod.CircuitOpenError):
+        await account.device("DEV2")._get_data()
+
+    fake.gates[VALUES].set()
+    assert (await probe).hot_water is True
+    assert breaker.state == "closed"
+
+
+# --- token page parsing -----------------------------------------------------
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        '<input type="hidden" value="TOK123" id="token" />',          # attribute order
+        "<INPUT id='token' value='TOK123'>",                           # quoting / case
+        '<input id="token" type="hidden" value="TOK123" /><input id="x" value="y" />',
+        '<input id="token" type="hidden" value="TOK123" data-x="1" />',
+    ],
+)
+async def test_token_is_found_in_any_attribute_layout(salus, html):
+    client, fake = salus
+    fake.token_html = html
+
+    await client._get_data()
+
+    assert client._token == "TOK123"
+
+
+async def test_token_read_stops_once_found(salus):
+    client, fake = salus
+    fake.chunk_size = 16
+    fake.token_html = '<html><input id="token" value="TOK123" />' + "<p>filler</p>" * 1000
+
+    await client._get_data()
+
+    stream = fake.responses[0].content
+    assert client._token == "TOK123"
+    assert stream.bytes_read < 100  # the rest of the page was never read
+
+
+async def test_token_split_across_chunks_is_found(salus):
+    client, fake = salus
+    fake.chunk_size = 3
+    fake.token_html = "<p>" * 50 + '<input data-value="no" id="token" value="TOK123" />'
+
+    await client._get_data()
+
+    assert client._token == "TOK123"
+
+
+async def test_unparseable_token_page_raises(salus):
     client, fake = salus
     fake.token_html = "<html>no token field here</html>"
 
     with pytest.raises(Exception):
-        client._get_data()
+        await client._get_data()
 
 
 # --- concurrency (the thundering-herd fix) ----------------------------------
 
-def test_concurrent_reads_share_a_single_login(mod):
+async def test_concurrent_reads_share_a_single_login(mod):
     fake = FakeSession()
 
-    # Make the control-page fetch slow so threads genuinely overlap and would,
+    # Make the control-page fetch slow so tasks genuinely overlap and would,
     # without the lock, each kick off their own login.
     real_get = fake.get
 
-    def slow_get(url, params=None):
-        if CONTROL in url:
-            time.sleep(0.05)
-        return real_get(url, params=params)
+    class SlowControl:
+        def __init__(self, response):
+            self._response = response
 
-    fake.get = slow_get
+        async def __aenter__(self):
+            await asyncio.sleep(0.05)
+            return self._response
+
+        async def __aexit__(self, *exc):
+            return False
 
-    client = mod.Salus("user", "pass", "DEV1")
-    client._session = fake
+    def slow_get(url, params=None, timeout=None):
+        response = real_get(url, params=params, timeout=timeout)
+        return SlowControl(response) if CONTROL in url else response
 
-    results = []
+    fake.get = slow_get
 
-    def worker():
-        results.append(client._get_data())
+    client = mod.SalusAccount("user", "pass", session=fake).device("DEV1")
 
-    threads = [threading.Thread(target=worker) for _ in range(5)]
-    for t in threads:
-        t.start()
-    for t in threads:
-        t.join()
+    results = await asyncio.gather(*(client._get_data() for _ in range(5)))
 
     assert count(fake, LOGIN) == 1   # lock serialized the herd into one login
     assert count(fake, VALUES) == 1  # and one shared fetch
     assert all(r is results[0] for r in results)
+
+
+# --- single-flight reads ----------------------------------------------------
+
+async def test_readers_attach_to_the_in_flight_fetch(salus):
+    client, fake = salus
+    gate = fake.gates[VALUES] = asyncio.Event()
+
+    readers = [asyncio.ensure_future(client._get_data()) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert not any(r.done() for r in readers)  # all waiting on the same fetch
+
+    gate.set()
+    results = await asyncio.gather(*readers)
+
+    assert count(fake, VALUES) == 1
+    assert all(r is results[0] for r in results)
+
+
+async def test_cancelled_reader_does_not_abort_the_shared_fetch(salus):
+    client, fake = salus
+    gate = fake.gates[VALUES] = asyncio.Event()
+
+    first = asyncio.ensure_future(client._get_data())
+    second = asyncio.ensure_future(client._get_data())
+    await asyncio.sleep(0)
+    first.cancel()
+    gate.set()
+
+    assert (await second).hot_water is True
+    assert count(fake, VALUES) == 1
+
+
+async def test_write_during_fetch_is_not_blocked_and_discards_stale_read(salus):
+    client, fake = salus
+    await client._get_data()
+    client._data = None  # force the next read onto the network
+    gate = fake.gates[VALUES] = asyncio.Event()
+
+    reader = asyncio.ensure_future(client._get_data())
+    while count(fake, VALUES) < 2:  # let the fetch reach the network
+        await asyncio.sleep(0)
+
+    # the write completes while the read is still parked on the network
+    assert await client._set_data({"hwmode_off": "1"}) is True
+    assert not reader.done()
+
+    gate.set()
+    await reader
+    assert client._data is None  # pre-write read was not cached
+
+    del fake.gates[VALUES]
+    await client._get_data()
+    assert count(fake, VALUES) == 3  # a fresh fetch after the write
+
+
+# --- session lifecycle ------------------------------------------------------
+
+async def test_close_only_closes_an_owned_session(mod):
+    shared = FakeSession()
+    account = mod.SalusAccount("user", "pass", session=shared)
+
+    await account.async_close()
+
+    assert shared.closed is False  # HA owns the shared session
+
+
+# --- multi-device accounts --------------------------------------------------
+
+async def test_devices_of_one_account_share_a_single_login(mod):
+    fake = FakeSession()
+    account = mod.SalusAccount("user", "pass", session=fake)
+    account.device("DEV1")
+    account.device("DEV2")
+
+    results = await account.async_refresh()
+
+    assert set(results) == {"DEV1", "DEV2"}
+    assert count(fake, LOGIN) == 1    # one login for the whole account
+    assert count(fake, CONTROL) == 2  # but a token per device
+    assert {c[2]["devId"] for c in calls_to(fake, VALUES)} == {"DEV1", "DEV2"}
+
+
+async def test_device_returns_the_same_client(mod):
+    account = mod.SalusAccount("user", "pass", session=FakeSession())
+
+    assert account.device("DEV1") is account.device("DEV1")
+
+
+async def test_batch_refresh_reports_failures_per_device(mod):
+    fake = FakeSession()
+    fake.values_queue = ['{"HWonOffStatus": "1"}'] + ["not json"] * 20
+    account = mod.SalusAccount("user", "pass", session=fake)
+    account.retry = mod.RetryPolicy(base_delay=0)
+    account.device("DEV1")
+    account.device("DEV2")
+
+    results = await account.async_refresh()
+
+    outcomes = sorted(isinstance(r, Exception) for r in results.values())
+    assert outcomes == [False, True]  # one device failed, the other still read
+
+
+# --- persisted login --------------------------------------------------------
+
+async def test_restored_login_skips_login_and_scrape(salus, mod):
+    client, fake = salus
+    await client._get_data()
+    fake.cookie_jar.update_cookies({"PHPSESSID": "abc"})
+    state = client._account.export_state()
+
+    fresh = FakeSession()
+    account = mod.SalusAccount("user@example.com", "secret", session=fresh)
+    restored = account.device("DEV1")
+    account.restore_state(state)
+    await restored._get_data()
+
+    assert count(fresh, LOGIN) == 0
+    assert count(fresh, CONTROL) == 0
+    (_, _, params) = calls_to(fresh, VALUES)[0]
+    assert params["token"] == "TOK123"
+    assert {m.key: m.value for m in fresh.cookie_jar}["PHPSESSID"] == "abc"
+
+
+async def test_restored_login_past_its_ttl_is_ignored(salus, mod):
+    client, fake = salus
+    await client._get_data()
+    state = client._account.export_state()
+    state["login_time"] -= mod.TOKEN_TTL + 1
+
+    fresh = FakeSession()
+    account = mod.SalusAccount("user@example.com", "secret", session=fresh)
+    account.device("DEV1")
+    account.restore_state(state)
+    await account.device("DEV1")._get_data()
+
+    assert count(fresh, LOGIN) == 1
+
+
+async def test_rejected_restored_login_falls_back_to_a_new_one(salus, mod):
+    client, fake = salus
+    await client._get_data()
+    state = client._account.export_state()
+
+    fresh = FakeSession()
+    fresh.values_queue = ["<html>session expired</html>", '{"HWonOffStatus": "0"}']
+    account = mod.SalusAccount("user@example.com", "secret", session=fresh)
+    account.retry = mod.RetryPolicy(base_delay=0)
+    account.device("DEV1")
+    account.restore_state(state)
+    data = await account.device("DEV1")._get_data()
+
+    assert data.hot_water is False
+    assert count(fresh, LOGIN) == 1
+
+
+async def test_auth_listener_fires_on_login_and_scrape(salus):
+    client, fake = salus
+    events = []
+    client._account.async_add_auth_listener(lambda: events.append(True))
+
+    await client._get_data()
+
+    assert len(events) == 2  # login + token scrape
+
+
+# --- last-known-state snapshot ----------------------------------------------
+
+async def test_snapshot_round_trip_seeds_an_expired_cache(salus, mod):
+    client, fake = salus
+    await client._get_data()
+    snapshot = client._account.export_snapshot()
+
+    fresh = FakeSession()
+    fresh.values_text = '{"HWonOffStatus": "0"}'
+    account = mod.SalusAccount("user@example.com", "secret", session=fresh)
+    account.device("DEV1")
+    restored = account.restore_snapshot(snapshot)
+
+    assert restored["DEV1"].hot_water is True  # shown before any request
+    assert fresh.calls == []
+    assert (await account.device("DEV1")._get_data()).hot_water is False
+    assert count(fresh, VALUES) == 1  # the restored values never count as fresh
+
+
+async def test_snapshot_skips_devices_never_read(salus):
+    client, fake = salus
+
+    assert client._account.export_snapshot() == {}
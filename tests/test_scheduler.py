@@ -0,0 +1,105 @@
+"""Unit tests for the request scheduler shared by all accounts."""
+import asyncio
+
+import pytest
+
+
+def scheduler(limit=2, stagger=0.0):
+    from salus_it500.scheduler import FetchScheduler
+
+    return FetchScheduler(limit, stagger)
+
+
+async def test_no_more_requests_than_the_limit_run_at_once():
+    pool = scheduler(limit=2)
+    running = peak = 0
+
+    async def request():
+        nonlocal running, peak
+        async with pool.slot("a"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(request() for _ in range(6)))
+
+    assert peak == 2
+    assert pool.running == 0
+
+
+async def test_waiting_accounts_take_turns():
+    pool = scheduler(limit=1)
+    release = asyncio.Event()
+    order = []
+
+    async def request(key):
+        async with pool.slot(key):
+            order.append(key)
+            await release.wait()
+
+    holder = asyncio.ensure_future(request("busy"))
+    await asyncio.sleep(0)
+    # a busy account queues a burst before a second account asks once
+    tasks = [asyncio.ensure_future(request("a")) for _ in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.ensure_future(request("b")))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, *tasks)
+
+    assert order == ["busy", "a", "b", "a", "a"]
+
+
+async def test_a_cancelled_waiter_does_not_leak_its_slot():
+    pool = scheduler(limit=1)
+    release = asyncio.Event()
+
+    async def request():
+        async with pool.slot("a"):
+            await release.wait()
+
+    holder = asyncio.ensure_future(request())
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(request())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    release.set()
+    await holder
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert pool.running == 0
+    assert pool.waiting == 0
+
+
+def test_starts_are_staggered():
+    pool = scheduler(stagger=5.0)
+
+    delays = [pool.start_delay() for _ in range(3)]
+
+    assert delays[0] == 0
+    assert delays[1] == pytest.approx(5.0, abs=0.1)
+    assert delays[2] == pytest.approx(10.0, abs=0.1)
+
+
+async def test_accounts_sharing_a_scheduler_are_bounded_together(mod):
+    from fakes import FakeSession
+
+    pool = scheduler(limit=1)
+    sessions = [FakeSession(), FakeSession()]
+    gate = asyncio.Event()
+    for session in sessions:
+        session.gates["ajax_device_values.php"] = gate
+    accounts = [
+        mod.SalusAccount(f"user{n}@example.com", "secret", session=session, scheduler=pool)
+        for n, session in enumerate(sessions)
+    ]
+    reads = [asyncio.ensure_future(account.device("DEV1")._get_data()) for account in accounts]
+    while not pool.waiting:
+        await asyncio.sleep(0)
+
+    assert pool.running == 1  # one values request out, the other account queued
+    gate.set()
+    await asyncio.gather(*reads)
+    assert accounts[1].metrics.slot_wait.count > 0
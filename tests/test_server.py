@@ -0,0 +1,161 @@
+"""End-to-end tests of the Salus client against the local stand-in server."""
+import pytest
+
+from salus_server import CONTROL_PATH, LOGIN_PATH, SET_PATH, VALUES_PATH
+
+
+# --- round trips over real sockets ------------------------------------------
+
+async def test_read_logs_in_scrapes_and_parses(live_account, salus_server):
+    client = live_account.device("DEV1")
+
+    data = await client._get_data()
+
+    assert data.room_temperature == 20.5
+    assert data.hot_water is True
+    assert salus_server.hits[LOGIN_PATH] == 1
+    assert salus_server.hits[CONTROL_PATH] == 1
+    assert salus_server.hits[VALUES_PATH] == 1
+
+
+async def test_write_reaches_the_server_and_reads_back(live_account, salus_server, mod):
+    client = live_account.device("DEV1")
+    client.WRITE_DEBOUNCE = 0.01
+
+    await client._get_data()
+    assert await client._set_data({"current_tempZ1": "23.5"})
+    client._data_time -= mod.DATA_TTL
+
+    assert salus_server.values["DEV1"]["CH1currentSetPoint"] == "23.5"
+    assert (await client._get_data()).target_temperature == 23.5
+    assert salus_server.hits[SET_PATH] == 1
+
+
+async def test_value_reads_reuse_one_keep_alive_connection(live_account, salus_server, mod):
+    client = live_account.device("DEV1")
+    await client._get_data()
+    peers = len(salus_server.peers)
+
+    for _ in range(5):
+        client._data_time -= mod.DATA_TTL
+        await client._get_data()
+
+    assert salus_server.hits[VALUES_PATH] == 6
+    assert len(salus_server.peers) <= peers + 1
+
+
+# --- session expiry ---------------------------------------------------------
+
+async def test_expired_session_answers_html_and_the_client_logs_in_again(live_account, salus_server, mod):
+    client = live_account.device("DEV1")
+    await client._get_data()
+
+    salus_server.expire_sessions()
+    client._data_time -= mod.DATA_TTL
+    data = await client._get_data()
+
+    assert data.room_temperature == 20.5
+    assert salus_server.hits[LOGIN_PATH] == 2
+    assert salus_server.hits[CONTROL_PATH] == 2
+
+
+async def test_write_after_session_expiry_logs_in_again_and_lands(live_account, salus_server):
+    client = live_account.device("DEV1")
+    client.WRITE_DEBOUNCE = 0.01
+    await client._get_data()
+
+    salus_server.expire_sessions()
+    assert await client._set_data({"current_tempZ1_set": "1", "current_tempZ1": "25"})
+
+    assert salus_server.values["DEV1"]["CH1currentSetPoint"] == "25"
+    assert client._data.target_temperature == 25.0
+    assert salus_server.hits[LOGIN_PATH] == 2
+    assert salus_server.hits[SET_PATH] == 2  # the dropped one and the retry
+
+
+# --- faults -----------------------------------------------------------------
+
+async def test_failing_write_is_not_shown_as_applied(live_account, salus_server):
+    client = live_account.device("DEV1")
+    client.WRITE_DEBOUNCE = 0.01
+    writes = []
+    live_account.async_add_write_listener(writes.append)
+    await client._get_data()
+
+    salus_server.error_rate = 1.0
+    live_account.retry.max_attempts = 3
+    with pytest.raises(Exception):
+        await client._set_data({"current_tempZ1_set": "1", "current_tempZ1": "25"})
+
+    assert client._data.target_temperature == 21.0
+    assert writes == []
+    assert live_account.metrics.latency["set"].count > 0
+
+
+async def test_server_errors_are_retried(live_account, salus_server):
+    salus_server.error_rate = 0.5
+
+    data = await live_account.device("DEV1")._get_data()
+
+    assert data.hot_water is True
+    assert sum(salus_server.hits.values()) > 3
+
+
+async def test_an_outage_costs_one_login_per_attempt(live_account, salus_server):
+    live_account.retry.max_attempts = 4
+    salus_server.error_rate = 1.0
+
+    with pytest.raises(Exception):
+        await live_account.device("DEV1")._get_data()
+
+    assert salus_server.hits[LOGIN_PATH] == 4
+    assert sum(salus_server.hits.values()) == 4
+
+
+async def test_error_answers_back_off_without_dropping_the_login(live_account, salus_server, mod):
+    client = live_account.device("DEV1")
+    await client._get_data()
+
+    live_account.retry.max_attempts = 3
+    salus_server.error_rate = 1.0
+    client._data_time -= mod.DATA_TTL
+    with pytest.raises(Exception):
+        await client._get_data()
+
+    salus_server.error_rate = 0.0
+    client._data_time -= mod.DATA_TTL
+    assert (await client._get_data()).hot_water is True
+    assert salus_server.hits[LOGIN_PATH] == 1
+    assert salus_server.hits[CONTROL_PATH] == 1
+
+
+async def test_rate_limited_reads_back_off_and_succeed(live_account, salus_server, mod):
+    client = live_account.device("DEV1")
+    # backoff long enough to outlast the rate limit window
+    live_account.retry = mod.RetryPolicy(base_delay=0.05, max_delay=0.2, deadline=5)
+    salus_server.rate_limit = (3, 0.2)
+    await client._get_data()  # login, control page and values use up the window
+
+    client._data_time -= mod.DATA_TTL
+    data = await client._get_data()
+
+    assert data.hot_water is True
+    assert salus_server.hits[VALUES_PATH] > 2
+
+
+async def test_slow_server_hits_the_read_timeout(live_account, salus_server):
+    live_account.retry.deadline = 0.5
+    salus_server.latency = 2.0
+
+    with pytest.raises(TimeoutError):
+        await live_account.device("DEV1")._get_data()
+
+
+async def test_slow_token_page_is_still_parsed(live_account, salus_server):
+    salus_server.page_padding = 64 * 1024
+    salus_server.body_chunk = 1024
+    salus_server.body_delay = 0.001
+
+    data = await live_account.device("DEV1")._get_data()
+
+    assert data.hot_water is True
@@ -0,0 +1,224 @@
+"""Tests for setting an account up and tearing it down (config entry reloads)."""
+import asyncio
+import os
+import types
+
+import pytest
+import voluptuous as vol
+
+from fakes import FakeSession, count
+
+LOGIN = "login.php"
+CONTROL = "control.php"
+
+
+class FakeHass:
+    def __init__(self, config_dir="."):
+        self.data = {}
+        self.storage = {}  # Store contents, kept across setups like .storage files
+        self.tasks = []
+        self.config = types.SimpleNamespace(path=lambda *parts: os.path.join(config_dir, *parts))
+
+    def async_create_task(self, coro):
+        # like HA (loop.create_task), only coroutines are accepted
+        if not asyncio.iscoroutine(coro):
+            raise TypeError(f"a coroutine was expected, got {coro!r}")
+        task = asyncio.ensure_future(coro)
+        self.tasks.append(task)
+        return task
+
+    def async_add_executor_job(self, func, *args):
+        # a Future, not a coroutine, like HA's
+        return asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+def account_config(mod, **overrides):
+    return mod.ACCOUNT_SCHEMA({"username": "user@example.com", "password": "secret", "id": "DEV1", **overrides})
+
+
+async def test_reload_reuses_the_saved_login(mod, monkeypatch):
+    hass = FakeHass()
+    sessions = []
+    monkeypatch.setattr(mod, "async_create_clientsession", lambda hass: sessions.append(FakeSession()) or sessions[-1])
+
+    _, unload = await mod._async_setup_account(hass, account_config(mod))
+    await asyncio.gather(*hass.tasks)
+    await unload()
+
+    assert sessions[0].closed
+    assert "DEV1" not in hass.data[mod.DOMAIN]
+
+    await mod._async_setup_account(hass, account_config(mod))
+    await asyncio.gather(*hass.tasks)
+
+    # the second setup read the device without logging in or scraping again
+    assert count(sessions[1], LOGIN) == 0
+    assert count(sessions[1], CONTROL) == 0
+    assert hass.data[mod.DOMAIN]["DEV1"].data["DEV1"].hot_water is True
+
+
+async def test_unload_stops_the_coordinator(mod, monkeypatch):
+    hass = FakeHass()
+    monkeypatch.setattr(mod, "async_create_clientsession", lambda hass: FakeSession())
+
+    _, unload = await mod._async_setup_account(hass, account_config(mod))
+    coordinator = hass.data[mod.DOMAIN]["DEV1"]
+    await asyncio.gather(*hass.tasks)
+    await unload()
+
+    assert coordinator.shut_down
+    assert coordinator.listeners == []
+    assert coordinator.account._write_listeners == []
+    assert coordinator.account._auth_listeners == []
+
+
+def test_entry_options_override_the_defaults(mod):
+    config = account_config(mod, deadline=30)
+
+    assert config["deadline"] == 30.0
+    assert config["read_timeout"] == mod.DEFAULT_READ_TIMEOUT
+    assert config["id"] == ["DEV1"]
+
+
+def test_data_ttl_must_be_shorter_than_the_fastest_poll(mod):
+    with pytest.raises(vol.Invalid):
+        account_config(mod, data_ttl=30, fast_scan_interval=30)
+    with pytest.raises(vol.Invalid):
+        account_config(mod, scan_interval=20, fast_scan_interval=30)
+
+
+async def test_option_changes_apply_to_the_running_account(mod, monkeypatch):
+    hass = FakeHass()
+    monkeypatch.setattr(mod, "async_create_clientsession", lambda hass: FakeSession())
+    await mod._async_setup_account(hass, account_config(mod))
+    await asyncio.gather(*hass.tasks)
+    coordinator = hass.data[mod.DOMAIN]["DEV1"]
+    fake = coordinator.account._session
+
+    mod._configure(coordinator, account_config(mod, data_ttl=5, fast_scan_interval=10, read_timeout=3))
+    coordinator.account.devices["DEV1"]._data_time -= 5
+
+    await coordinator.account.devices["DEV1"]._get_data()  # expired under the new TTL
+    assert count(fake, "ajax_device_values.php") == 2
+    assert coordinator.account.timeout.sock_read == 3
+    assert coordinator.adaptive.fast.total_seconds() == 10
+
+
+async def test_history_file_survives_a_reload(mod, monkeypatch, tmp_path):
+    (tmp_path / ".storage").mkdir()
+    hass = FakeHass(tmp_path)
+    monkeypatch.setattr(mod, "async_create_clientsession", lambda hass: FakeSession())
+
+    _, unload = await mod._async_setup_account(hass, account_config(mod, history_file=True))
+    await asyncio.gather(*hass.tasks)
+    await unload()
+    assert (tmp_path / ".storage" / "salus_it500.history.DEV1").exists()
+
+    await mod._async_setup_account(hass, account_config(mod, history_file=True))
+    history = hass.data[mod.DOMAIN]["DEV1"].account.devices["DEV1"].history
+
+    assert len(history) == 1  # restored; the new refresh has not run yet
+
+
+async def test_accounts_keep_their_own_saved_login(mod, monkeypatch):
+    hass = FakeHass()
+    monkeypatch.setattr(mod, "async_create_clientsession", lambda hass: FakeSession())
+    monkeypatch.setattr(mod, "STARTUP_STAGGER", 0)
+
+    setups = [
+        await mod._async_setup_account(hass, account_config(mod, username=username, id=deviceId))
+        for username, deviceId in (("a@example.com", "DEV1"), ("b@example.com", "DEV2"))
+    ]
+    await asyncio.gather(*hass.tasks)
+    first, second = (coordinator.account for coordinator, _ in setups)
+    for _, unload in setups:
+        await unload()
+
+    assert first.scheduler is second.scheduler
+    saved = hass.storage[mod.STORAGE_KEY]
+    assert saved.keys() == {"a@example.com", "b@example.com"}
+    assert saved["b@example.com"]["tokens"].keys() == {"DEV2"}
+    assert hass.storage[mod.STORAGE_SNAPSHOT_KEY].keys() == {"a@example.com", "b@example.com"}
+
+
+def test_yaml_takes_a_list_of_accounts(mod):
+    account = {"username": "a@example.com", "password": "secret", "id": "DEV1"}
+
+    single = mod.CONFIG_SCHEMA({mod.DOMAIN: account})
+    several = mod.CONFIG_SCHEMA({mod.DOMAIN: [account, {**account, "username": "b@example.com", "id": "DEV2"}]})
+
+    assert len(single[mod.DOMAIN]) == 1
+    assert [config["id"] for config in several[mod.DOMAIN]] == [["DEV1"], ["DEV2"]]
+
+
+async def test_history_file_is_flushed_while_running(mod, monkeypatch, tmp_path):
+    (tmp_path / ".storage").mkdir()
+    hass = FakeHass(tmp_path)
+    monkeypatch.setattr(mod, "async_create_clientsession", lambda hass: FakeSession())
+    await mod._async_setup_account(hass, account_config(mod, history_file=True))
+    await asyncio.gather(*hass.tasks)
+    coordinator = hass.data[mod.DOMAIN]["DEV1"]
+    path = tmp_path / ".storage" / "salus_it500.history.DEV1"
+    assert not path.exists()
+
+    now = mod.time.monotonic()
+    monkeypatch.setattr(mod.time, "monotonic", lambda: now + mod.HISTORY_FLUSH_INTERVAL)
+    for listener in list(coordinator.listeners):
+        listener()
+    await asyncio.gather(*hass.tasks)
+
+    assert path.exists()
+
+
+async def test_unload_sends_a_write_still_in_its_debounce(mod, monkeypatch):
+    hass = FakeHass()
+    monkeypatch.setattr(mod, "async_create_clientsession", lambda hass: FakeSession())
+    _, unload = await mod._async_setup_account(hass, account_config(mod))
+    await asyncio.gather(*hass.tasks)
+    client = hass.data[mod.DOMAIN]["DEV1"].account.devices["DEV1"]
+    fake = client._account._session
+
+    write = asyncio.ensure_future(client._set_data({"hwmode_off": "1"}))
+    await asyncio.sleep(0)
+    await unload()
+
+    assert await write is True
+    assert count(fake, "set.php") == 1
+    assert fake.closed
+    assert client._pushes == set()
+
+
+async def test_unload_waits_for_a_periodic_flush(mod, monkeypatch, tmp_path):
+    import threading
+    import time
+
+    (tmp_path / ".storage").mkdir()
+    hass = FakeHass(tmp_path)
+    monkeypatch.setattr(mod, "async_create_clientsession", lambda hass: FakeSession())
+    coordinator, unload = await mod._async_setup_account(hass, account_config(mod, history_file=True))
+    await asyncio.gather(*hass.tasks)
+    fake = coordinator.account._session
+
+    write_files, lock = mod._write_files, threading.Lock()
+    running = peak = 0
+
+    def slow_write(dumps):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        write_files(dumps)
+        with lock:
+            running -= 1
+
+    monkeypatch.setattr(mod, "_write_files", slow_write)
+    now = mod.time.monotonic()
+    monkeypatch.setattr(mod.time, "monotonic", lambda: now + mod.HISTORY_FLUSH_INTERVAL)
+    for listener in list(coordinator.listeners):
+        listener()
+    await unload()  # while the periodic flush is still writing
+
+    assert peak == 1
+    assert fake.closed
+    assert (tmp_path / ".storage" / "salus_it500.history.DEV1").exists()